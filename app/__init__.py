@@ -20,8 +20,25 @@ def create_app():
     migrate.init_app(app, db)
     ma.init_app(app)
 
+    from app.services.response_cache import response_cache
+    response_cache.init_app(app)
+    from app.services.openai_client import client_manager
+    client_manager.init_app(app)
+    from app.services.llm_provider import provider_manager
+    provider_manager.init_app(app)
+    from app.services.upstream_policy import upstream_policy
+    upstream_policy.init_app(app)
+    from app.services.circuit_breaker import circuit_breaker
+    circuit_breaker.init_app(app)
+    from app.services.single_flight import single_flight
+    single_flight.init_app(app)
+    from app.services.passwords import password_hasher
+    password_hasher.init_app(app)
+    from app.services.search_log import search_log
+    search_log.init_app(app)
+
     # Import models so Flask-Migrate can detect them
-    from app.models import User, SavedItem, SearchedItem
+    from app.models import User, SavedItem, SearchedItem, TopicSearchCount, TokenUsage, PrewarmedGeneration
 
     # Register blueprints (import here to avoid circular imports)
     from app.routes.auth import auth_bp
@@ -36,10 +53,23 @@ def create_app():
     app.register_blueprint(trending_bp)
     from app.routes.favourites import favourites_bp
     app.register_blueprint(favourites_bp)
+    from app.routes.usage import usage_bp
+    app.register_blueprint(usage_bp)
+    from app.routes.metrics import metrics_bp
+    app.register_blueprint(metrics_bp)
 
     from app.errors.handlers import register_error_handlers
     register_error_handlers(app)
 
+    from app.services.metrics import register_metrics
+    register_metrics(app)
+
+    from app.services.compression import register_compression
+    register_compression(app)
+
+    from app.cli import register_commands
+    register_commands(app)
+
     @app.route('/ping')
     def ping():
         return 'OK', 200
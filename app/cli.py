@@ -0,0 +1,74 @@
+import click
+from flask.cli import AppGroup, with_appcontext
+from app import db
+
+
+trending_cli = AppGroup('trending', help='Manage trending topic rollups.')
+
+
+@trending_cli.command('backfill')
+def backfill_trending():
+    """Rebuild trending rollups from the full searched_items history (new searches wait until it finishes)."""
+    from app.services.trending import backfill_rollups
+
+    rows = backfill_rollups()
+    db.session.commit()
+    click.echo(f'Rebuilt {rows} trending rollup rows.')
+
+
+prewarm_cli = AppGroup('prewarm', help='Pre-generate facts and quotes for trending topics.')
+
+
+@prewarm_cli.command('run')
+@click.option('--top', type=int, default=None, help='Topics per feature (default PREWARM_TOP_N).')
+@click.option('--force', is_flag=True, help='Run even outside PREWARM_HOURS.')
+def run_prewarm(top, force):
+    """Generate facts/quotes for the top trending topics, within the configured budget."""
+    from app.services.prewarm import in_prewarm_window, prewarm
+
+    if not force and not in_prewarm_window():
+        click.echo('Outside PREWARM_HOURS, skipping (use --force to run anyway).')
+        return
+
+    stats = prewarm(top_n=top)
+    click.echo(
+        f"Generated {stats['generated']}, skipped {stats['skipped']} still fresh, "
+        f"{stats['failed']} failed, purged {stats['purged']} expired; "
+        f"{stats['calls']} upstream calls, {stats['tokens']} tokens."
+    )
+    if stats['stopped']:
+        click.echo(f"Stopped early: {stats['stopped']}.")
+
+
+@click.command('check-query-plans')
+@click.option('--scratch', is_flag=True,
+              help='Confirm the database is disposable (needed unless its name contains "scratch" or "test").')
+@with_appcontext
+def check_query_plans_command(scratch):
+    """EXPLAIN every hot route query against seeded data; fail on sequential scans."""
+    from flask import current_app
+    from app.services.query_plans import check_query_plans, is_scratch_database
+
+    # It writes seed rows (rolled back) and runs ANALYZE - never against a live database
+    if not scratch and not is_scratch_database(current_app.config['SQLALCHEMY_DATABASE_URI']):
+        raise click.ClickException(
+            'Refusing to run against a database that does not look like a scratch one. '
+            'Point DATABASE_URL at a disposable database, or pass --scratch if it is one.'
+        )
+
+    failed = 0
+    for name, full_scan, lines in check_query_plans():
+        click.echo(f'{"SEQ SCAN" if full_scan else "ok":8} {name}')
+        if full_scan:
+            failed += 1
+            for line in lines:
+                click.echo(f'         {line}')
+
+    if failed:
+        raise click.ClickException(f'{failed} route queries fall back to a sequential scan.')
+
+
+def register_commands(app):
+    app.cli.add_command(trending_cli)
+    app.cli.add_command(prewarm_cli)
+    app.cli.add_command(check_query_plans_command)
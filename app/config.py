@@ -6,4 +6,140 @@ class Config:
     SQLALCHEMY_DATABASE_URI = os.getenv('DATABASE_URL')
     JWT_SECRET_KEY = os.getenv('JWT_SECRET_KEY') or os.getenv('SECRET_KEY')
     JWT_ACCESS_TOKEN_EXPIRES = timedelta(days=30)
-    OPENAI_API_KEY = os.getenv('OPENAI_API_KEY')
\ No newline at end of file
+    OPENAI_API_KEY = os.getenv('OPENAI_API_KEY')
+    OPENAI_MODEL = os.getenv('OPENAI_MODEL', 'gpt-4o-mini')
+
+    # LLM backend: "openai", or "stub" for offline runs and load tests. The stub's
+    # latency is LLM_STUB_LATENCY_MS ("fixed"), with stdev LLM_STUB_LATENCY_JITTER ms
+    # ("normal"), or as the median with sigma LLM_STUB_LATENCY_JITTER ("lognormal")
+    LLM_PROVIDER = os.getenv('LLM_PROVIDER', 'openai')
+    LLM_STUB_LATENCY_MS = float(os.getenv('LLM_STUB_LATENCY_MS', 500))
+    LLM_STUB_LATENCY_DISTRIBUTION = os.getenv('LLM_STUB_LATENCY_DISTRIBUTION', 'fixed')
+    LLM_STUB_LATENCY_JITTER = float(os.getenv('LLM_STUB_LATENCY_JITTER', 0))
+    LLM_STUB_ERROR_RATE = float(os.getenv('LLM_STUB_ERROR_RATE', 0))
+    LLM_STUB_STREAM_CHUNK_DELAY_MS = float(os.getenv('LLM_STUB_STREAM_CHUNK_DELAY_MS', 20))
+    LLM_STUB_SEED = int(os.getenv('LLM_STUB_SEED', 0))
+
+    # Daily quota: "requests" (DAILY_LIMIT AI requests) or "tokens" (DAILY_TOKEN_LIMIT
+    # prompt + completion tokens, so long conversations cost more than a fact lookup)
+    QUOTA_MODE = os.getenv('QUOTA_MODE', 'requests')
+    DAILY_TOKEN_LIMIT = int(os.getenv('DAILY_TOKEN_LIMIT', 50000))
+
+    # Password hashing: a full werkzeug method spec (hashes made with another spec
+    # are upgraded on login), run on PASSWORD_HASH_WORKERS processes (0 = inline)
+    # with at most PASSWORD_HASH_MAX_CONCURRENT queued or running per worker
+    PASSWORD_HASH_METHOD = os.getenv('PASSWORD_HASH_METHOD', 'pbkdf2:sha256:1000000')
+    PASSWORD_HASH_WORKERS = int(os.getenv('PASSWORD_HASH_WORKERS', 2))
+    PASSWORD_HASH_MAX_CONCURRENT = int(os.getenv('PASSWORD_HASH_MAX_CONCURRENT', 8))
+    PASSWORD_HASH_QUEUE_TIMEOUT = float(os.getenv('PASSWORD_HASH_QUEUE_TIMEOUT', 10))
+
+    # Response cache for facts/quotes (TTL in seconds, 0 disables a feature)
+    RESPONSE_CACHE_MAX_ENTRIES = int(os.getenv('RESPONSE_CACHE_MAX_ENTRIES', 1024))
+    RESPONSE_CACHE_DIR = os.getenv('RESPONSE_CACHE_DIR')  # Shared tier across workers, off if unset
+    RESPONSE_CACHE_DIR_MAX_ENTRIES = int(os.getenv('RESPONSE_CACHE_DIR_MAX_ENTRIES', 10000))
+    RESPONSE_CACHE_SWEEP_INTERVAL = int(os.getenv('RESPONSE_CACHE_SWEEP_INTERVAL', 60))  # Seconds between expiry sweeps
+    RESPONSE_CACHE_TTL = {
+        'facts': int(os.getenv('FACTS_CACHE_TTL', 3600)),
+        'quotes': int(os.getenv('QUOTES_CACHE_TTL', 3600)),
+    }
+
+    # Pooled OpenAI HTTP client (one per worker process)
+    OPENAI_MAX_CONNECTIONS = int(os.getenv('OPENAI_MAX_CONNECTIONS', 100))
+    OPENAI_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv('OPENAI_MAX_KEEPALIVE_CONNECTIONS', 20))
+    OPENAI_KEEPALIVE_EXPIRY = float(os.getenv('OPENAI_KEEPALIVE_EXPIRY', 60))
+    OPENAI_TIMEOUT = float(os.getenv('OPENAI_TIMEOUT', 60))
+    OPENAI_CONNECT_TIMEOUT = float(os.getenv('OPENAI_CONNECT_TIMEOUT', 5))
+    OPENAI_HTTP2 = os.getenv('OPENAI_HTTP2', 'false').lower() == 'true'
+
+    # Who may scrape GET /metrics: clients from METRICS_ALLOWED_IPS (comma-separated,
+    # loopback by default), or anyone sending "Authorization: Bearer <METRICS_TOKEN>"
+    METRICS_TOKEN = os.getenv('METRICS_TOKEN')
+    METRICS_ALLOWED_IPS = [ip.strip() for ip in os.getenv('METRICS_ALLOWED_IPS', '127.0.0.1,::1').split(',') if ip.strip()]
+
+    # gzip/brotli for JSON responses of at least COMPRESSION_MIN_SIZE bytes
+    COMPRESSION_ENABLED = os.getenv('COMPRESSION_ENABLED', 'true').lower() == 'true'
+    COMPRESSION_MIN_SIZE = int(os.getenv('COMPRESSION_MIN_SIZE', 1024))
+
+    # Upstream call policy, per feature: total deadline (seconds, retries included)
+    # and whether slow calls get a hedged second request after the recent p95 latency
+    UPSTREAM_DEADLINE = {
+        'facts': float(os.getenv('FACTS_UPSTREAM_DEADLINE', 20)),
+        'quotes': float(os.getenv('QUOTES_UPSTREAM_DEADLINE', 20)),
+        'conversation': float(os.getenv('CONVERSATION_UPSTREAM_DEADLINE', 45)),
+        'summary': float(os.getenv('SUMMARY_UPSTREAM_DEADLINE', 20)),
+    }
+    UPSTREAM_HEDGE = {
+        'facts': os.getenv('FACTS_UPSTREAM_HEDGE', 'true').lower() == 'true',
+        'quotes': os.getenv('QUOTES_UPSTREAM_HEDGE', 'true').lower() == 'true',
+        'conversation': os.getenv('CONVERSATION_UPSTREAM_HEDGE', 'false').lower() == 'true',
+        'summary': os.getenv('SUMMARY_UPSTREAM_HEDGE', 'false').lower() == 'true',
+    }
+    UPSTREAM_MAX_RETRIES = int(os.getenv('UPSTREAM_MAX_RETRIES', 2))
+    UPSTREAM_RETRY_BASE_DELAY = float(os.getenv('UPSTREAM_RETRY_BASE_DELAY', 0.25))
+    UPSTREAM_HEDGE_MIN_DELAY = float(os.getenv('UPSTREAM_HEDGE_MIN_DELAY', 1.0))
+    UPSTREAM_HEDGE_PERCENTILE = float(os.getenv('UPSTREAM_HEDGE_PERCENTILE', 95))
+    UPSTREAM_HEDGE_MAX_THREADS = int(os.getenv('UPSTREAM_HEDGE_MAX_THREADS', 64))
+
+    # Circuit breaker around the LLM provider: opens when FAILURE_RATIO of at least
+    # MIN_CALLS calls in the last WINDOW seconds failed or took over SLOW_CALL seconds,
+    # fails fast with 503 for OPEN_SECONDS, then lets PROBES trial calls through.
+    # Shared by all workers on the host when STATE_DIR is set
+    CIRCUIT_BREAKER_ENABLED = os.getenv('CIRCUIT_BREAKER_ENABLED', 'true').lower() == 'true'
+    CIRCUIT_BREAKER_FAILURE_RATIO = float(os.getenv('CIRCUIT_BREAKER_FAILURE_RATIO', 0.5))
+    CIRCUIT_BREAKER_MIN_CALLS = int(os.getenv('CIRCUIT_BREAKER_MIN_CALLS', 10))
+    CIRCUIT_BREAKER_WINDOW = int(os.getenv('CIRCUIT_BREAKER_WINDOW', 30))
+    CIRCUIT_BREAKER_SLOW_CALL = float(os.getenv('CIRCUIT_BREAKER_SLOW_CALL', 15))
+    CIRCUIT_BREAKER_OPEN_SECONDS = int(os.getenv('CIRCUIT_BREAKER_OPEN_SECONDS', 30))
+    CIRCUIT_BREAKER_PROBES = int(os.getenv('CIRCUIT_BREAKER_PROBES', 2))
+    CIRCUIT_BREAKER_STATE_DIR = os.getenv('CIRCUIT_BREAKER_STATE_DIR')
+
+    # DB pool shared by all requests (greenlets) in a worker process. SQLite picks
+    # its own pool class (StaticPool for :memory:), which takes no sizing options
+    SQLALCHEMY_ENGINE_OPTIONS = {'pool_pre_ping': True}
+    if not (SQLALCHEMY_DATABASE_URI or '').startswith('sqlite'):
+        SQLALCHEMY_ENGINE_OPTIONS.update({
+            'pool_size': int(os.getenv('DB_POOL_SIZE', 5)),
+            'max_overflow': int(os.getenv('DB_MAX_OVERFLOW', 10)),
+            'pool_timeout': int(os.getenv('DB_POOL_TIMEOUT', 10)),
+        })
+
+    # Max concurrent upstream calls per /facts/batch or /quotes/batch request
+    BATCH_MAX_CONCURRENCY = int(os.getenv('BATCH_MAX_CONCURRENCY', 5))
+
+    # Coalesce identical in-flight generations across workers on this host
+    # (also needs RESPONSE_CACHE_DIR so waiting workers can pick up the result)
+    SINGLE_FLIGHT_LOCK_DIR = os.getenv('SINGLE_FLIGHT_LOCK_DIR')
+
+    # How long auth_required trusts that a token's user still exists (seconds)
+    PRINCIPAL_CACHE_TTL = int(os.getenv('PRINCIPAL_CACHE_TTL', 30))
+
+    # Write-behind buffer for facts/quotes search history: flush every BATCH_SIZE
+    # searches or FLUSH_INTERVAL_MS, block up to ENQUEUE_TIMEOUT_MS when MAX_PENDING
+    # searches are queued and then write synchronously. A failed batch write is
+    # retried up to MAX_ATTEMPTS times in all, RETRY_DELAY_MS apart (doubling)
+    SEARCH_LOG_BUFFERED = os.getenv('SEARCH_LOG_BUFFERED', 'true').lower() == 'true'
+    SEARCH_LOG_BATCH_SIZE = int(os.getenv('SEARCH_LOG_BATCH_SIZE', 100))
+    SEARCH_LOG_FLUSH_INTERVAL_MS = int(os.getenv('SEARCH_LOG_FLUSH_INTERVAL_MS', 500))
+    SEARCH_LOG_MAX_PENDING = int(os.getenv('SEARCH_LOG_MAX_PENDING', 10000))
+    SEARCH_LOG_ENQUEUE_TIMEOUT_MS = int(os.getenv('SEARCH_LOG_ENQUEUE_TIMEOUT_MS', 250))
+    SEARCH_LOG_MAX_ATTEMPTS = int(os.getenv('SEARCH_LOG_MAX_ATTEMPTS', 3))
+    SEARCH_LOG_RETRY_DELAY_MS = int(os.getenv('SEARCH_LOG_RETRY_DELAY_MS', 500))
+
+    # Pre-warming: `flask prewarm run` (run it from a scheduler) generates facts and
+    # quotes for the top PREWARM_TOP_N trending topics per feature during PREWARM_HOURS
+    # (UTC, "start-end"), stopping after PREWARM_MAX_CALLS upstream calls or
+    # PREWARM_MAX_TOKENS tokens. Requests without a comment are answered from those
+    # results while they're younger than PREWARM_FRESHNESS seconds
+    PREWARM_SERVE = os.getenv('PREWARM_SERVE', 'true').lower() == 'true'
+    PREWARM_TOP_N = int(os.getenv('PREWARM_TOP_N', 20))
+    PREWARM_HOURS = os.getenv('PREWARM_HOURS', '2-6')
+    PREWARM_MAX_CALLS = int(os.getenv('PREWARM_MAX_CALLS', 40))
+    PREWARM_MAX_TOKENS = int(os.getenv('PREWARM_MAX_TOKENS', 40000))
+    PREWARM_FRESHNESS = int(os.getenv('PREWARM_FRESHNESS', 86400))
+
+    # Conversation prompts: history (summary + recent messages) is kept within
+    # HISTORY_TOKEN_BUDGET; when it overflows, older messages are folded into a
+    # rolling summary until the recent ones fit in HISTORY_RECENT_TOKENS
+    HISTORY_TOKEN_BUDGET = int(os.getenv('HISTORY_TOKEN_BUDGET', 3000))
+    HISTORY_RECENT_TOKENS = int(os.getenv('HISTORY_RECENT_TOKENS', 1500))
+    HISTORY_SUMMARY_MAX_TOKENS = int(os.getenv('HISTORY_SUMMARY_MAX_TOKENS', 300))
@@ -45,4 +45,17 @@ class RateLimitError(AppError):
 class OpenAIError(AppError):
     """500 - OpenAI API call failed."""
     def __init__(self, message='AI service error'):
-        super().__init__(message, 500)
\ No newline at end of file
+        super().__init__(message, 500)
+
+
+class ServiceUnavailableError(AppError):
+    """503 - Temporarily overloaded, try again shortly."""
+    def __init__(self, message='Service temporarily unavailable'):
+        super().__init__(message, 503)
+
+
+class UpstreamUnavailableError(ServiceUnavailableError):
+    """503 - The AI service is failing, so calls are paused for retry_after seconds."""
+    def __init__(self, message='AI service is temporarily unavailable', retry_after=30):
+        self.retry_after = retry_after
+        super().__init__(message)
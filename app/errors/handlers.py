@@ -3,7 +3,7 @@
 from flask import jsonify
 from marshmallow import ValidationError
 
-from app.errors.exceptions import AppError
+from app.errors.exceptions import AppError, UpstreamUnavailableError
 
 
 def register_error_handlers(app):
@@ -16,7 +16,16 @@ def register_error_handlers(app):
             'status': error.status_code
         }), error.status_code
 
-    
+    # Circuit breaker is open - tell clients when it's worth trying again
+    @app.errorhandler(UpstreamUnavailableError)
+    def handle_upstream_unavailable(error):
+        response = jsonify({
+            'error': error.message,
+            'status': error.status_code
+        })
+        response.headers['Retry-After'] = str(error.retry_after)
+        return response, error.status_code
+
     # Catch Flask's built-in 404 (e.g., hitting a URL that doesn't exist)
     @app.errorhandler(404)
     def handle_404(error):
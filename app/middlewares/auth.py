@@ -1,7 +1,59 @@
 from functools import wraps
-from flask import jsonify
+from flask import current_app, jsonify
 from flask_jwt_extended import verify_jwt_in_request, get_jwt_identity
+from sqlalchemy import event
+from app import db
 from app.models.user import User
+from app.services.metrics import time_stage
+from app.services.response_cache import LRUCache
+
+# JWT identity -> True for users known to exist. Only existence is cached;
+# anything else about the user (e.g., quota fields) is always read fresh.
+principal_cache = LRUCache(max_entries=10000)
+
+
+class Principal:
+    """
+    The authenticated caller, passed to routes as `current_user`.
+
+    `.id` is free. Any other attribute (e.g., `current_user.username`) loads the
+    User row on first access, so endpoints that only need the id never touch it.
+    """
+
+    def __init__(self, user_id):
+        self.id = user_id
+        self._user = None
+
+    @property
+    def user(self):
+        if self._user is None:
+            self._user = db.session.get(User, self.id)
+        return self._user
+
+    def __getattr__(self, name):
+        return getattr(self.user, name)
+
+
+def invalidate_principal(user_id):
+    """Drops a user from this worker's principal cache. Called automatically when a User row changes."""
+    principal_cache.delete(str(user_id))
+
+
+@event.listens_for(User, 'after_update')
+@event.listens_for(User, 'after_delete')
+def _invalidate_on_change(mapper, connection, target):
+    invalidate_principal(target.id)
+
+
+def _user_exists(user_id):
+    key = str(user_id)
+    if principal_cache.get(key):
+        return True
+
+    exists = db.session.query(User.id).filter_by(id=user_id).first() is not None
+    if exists:
+        principal_cache.set(key, True, current_app.config['PRINCIPAL_CACHE_TTL'])
+    return exists
 
 
 def auth_required(func):
@@ -9,17 +61,17 @@ def auth_required(func):
     def decorated(*args, **kwargs):
         #1. Verify JWT token is present and valid
         try:
-            verify_jwt_in_request()
+            with time_stage('jwt_verify'):
+                verify_jwt_in_request()
+                user_id = int(get_jwt_identity())
         except Exception as e:
             return jsonify({'error': 'Missing or invalid token'}), 401
 
-        #2. Get user id from token
-        user_id = get_jwt_identity()
-        user = User.query.get(user_id)
-        if not user:
+        #2. Check the user still exists (cached for PRINCIPAL_CACHE_TTL seconds)
+        if not _user_exists(user_id):
             return jsonify({'error': 'User not found'}), 404
 
-        kwargs['current_user'] = user
+        kwargs['current_user'] = Principal(user_id)
         return func(*args, **kwargs)
 
-    return decorated
\ No newline at end of file
+    return decorated
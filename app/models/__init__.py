@@ -2,4 +2,7 @@ from app.models.user import User
 from app.models.saved_item import SavedItem
 from app.models.searched_item import SearchedItem
 from app.models.conversation import Conversation
-from app.models.conversation_message import ConversationMessage
\ No newline at end of file
+from app.models.conversation_message import ConversationMessage
+from app.models.topic_search_count import TopicSearchCount
+from app.models.token_usage import TokenUsage
+from app.models.prewarmed_generation import PrewarmedGeneration
@@ -1,17 +1,38 @@
 from app import db
 from datetime import datetime
+from sqlalchemy import func, select
+from sqlalchemy.orm import column_property
+from app.models.conversation_message import ConversationMessage
 
 
 class Conversation(db.Model):
     __tablename__ = 'conversations'
+    __table_args__ = (
+        db.Index('ix_conversations_user_created', 'user_id', 'created_at', 'id'),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
     title = db.Column(db.String(200), nullable=False)  # Auto-set from first message
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+    # Rolling summary of the messages up to summarized_through_id, sent in their
+    # place once the history outgrows HISTORY_TOKEN_BUDGET
+    summary = db.Column(db.Text, nullable=True)
+    summarized_through_id = db.Column(db.Integer, nullable=True)
 
     # Relationship
     messages = db.relationship('ConversationMessage', backref='conversation', lazy=True, order_by='ConversationMessage.created_at')
 
+    # Number of user turns, computed in SQL. Deferred so it's only loaded when a
+    # query asks for it with undefer(Conversation.message_count)
+    message_count = column_property(
+        select(func.count(ConversationMessage.id))
+        .where(ConversationMessage.conversation_id == id, ConversationMessage.role == 'user')
+        .correlate_except(ConversationMessage)
+        .scalar_subquery(),
+        deferred=True,
+    )
+
     def __repr__(self):
         return f'<Conversation {self.id}: {self.title[:30]}>'
\ No newline at end of file
@@ -4,6 +4,10 @@ from datetime import datetime
 
 class ConversationMessage(db.Model):
     __tablename__ = 'conversation_messages'
+    __table_args__ = (
+        db.Index('ix_conversation_messages_conversation_role', 'conversation_id', 'role'),
+        db.Index('ix_conversation_messages_conversation_created', 'conversation_id', 'created_at'),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     conversation_id = db.Column(db.Integer, db.ForeignKey('conversations.id'), nullable=False)
@@ -0,0 +1,24 @@
+from app import db
+
+
+class PrewarmedGeneration(db.Model):
+    """
+    Facts or quotes generated ahead of time for a trending topic (see
+    services/prewarm.py). One row per (feature, topic, model); topic is
+    normalized like the trending rollups, model is the "<provider>/<model>"
+    that generated it and content is the generated list as JSON.
+    """
+    __tablename__ = 'prewarmed_generations'
+    __table_args__ = (
+        db.UniqueConstraint('feature', 'topic', 'model', name='uq_prewarmed_generations_key'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    feature = db.Column(db.String(10), nullable=False)
+    topic = db.Column(db.String(200), nullable=False)
+    model = db.Column(db.String(100), nullable=False)
+    content = db.Column(db.Text, nullable=False)
+    generated_at = db.Column(db.DateTime, nullable=False)
+
+    def __repr__(self):
+        return f'<PrewarmedGeneration {self.feature}: {self.topic} @ {self.generated_at}>'
@@ -4,6 +4,10 @@ from datetime import datetime
 
 class SavedItem(db.Model):
     __tablename__ = 'saved_items'
+    __table_args__ = (
+        db.Index('ix_saved_items_user_created', 'user_id', 'created_at', 'id'),
+        db.Index('ix_saved_items_user_category_created', 'user_id', 'category', 'created_at', 'id'),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
@@ -11,7 +15,7 @@ class SavedItem(db.Model):
     content = db.Column(db.Text, nullable=False)
     author = db.Column(db.String(200), nullable=True)  # Only for quotes
     topic = db.Column(db.String(200), nullable=False)
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
 
     def __repr__(self):
         return f'<SavedItem {self.category}: {self.content[:30]}>'
\ No newline at end of file
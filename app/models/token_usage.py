@@ -0,0 +1,24 @@
+from app import db
+
+
+class TokenUsage(db.Model):
+    """
+    Daily LLM token totals. One row per (user, day, feature), where feature is
+    "facts", "quotes", "conversation" or "summary" (conversation summaries).
+    Only upstream calls are counted - cache hits cost nothing.
+    """
+    __tablename__ = 'token_usage_daily'
+    __table_args__ = (
+        db.UniqueConstraint('user_id', 'day', 'feature', name='uq_token_usage_daily_key'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    day = db.Column(db.Date, nullable=False)
+    feature = db.Column(db.String(20), nullable=False)
+    requests = db.Column(db.Integer, nullable=False, default=0)
+    prompt_tokens = db.Column(db.Integer, nullable=False, default=0)
+    completion_tokens = db.Column(db.Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f'<TokenUsage {self.user_id}/{self.day}/{self.feature}: {self.prompt_tokens}+{self.completion_tokens}>'
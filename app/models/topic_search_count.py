@@ -0,0 +1,28 @@
+from app import db
+
+
+# Special values for the rollup key columns
+ALL_FEATURES = 'all'
+ALL_TIME = 'all'
+
+
+class TopicSearchCount(db.Model):
+    """
+    Rolled-up search counters used by trending.
+    One row per (feature, topic, bucket), where bucket is a day ("2026-02-23")
+    or ALL_TIME, and feature is "facts", "quotes" or ALL_FEATURES.
+    """
+    __tablename__ = 'topic_search_counts'
+    __table_args__ = (
+        db.UniqueConstraint('feature', 'topic', 'bucket', name='uq_topic_search_counts_key'),
+        db.Index('ix_topic_search_counts_ranking', 'feature', 'bucket', 'count'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    feature = db.Column(db.String(10), nullable=False)
+    topic = db.Column(db.String(200), nullable=False)
+    bucket = db.Column(db.String(10), nullable=False)
+    count = db.Column(db.Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f'<TopicSearchCount {self.feature}/{self.bucket}: {self.topic}={self.count}>'
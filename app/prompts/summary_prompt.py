@@ -0,0 +1,33 @@
+SUMMARY_SYSTEM_PROMPT = """You maintain a running summary of a conversation between a user and an assistant.
+The summary replaces the older messages when the conversation is sent back to the assistant,
+so it must keep everything needed to continue the conversation naturally.
+Rules:
+- Keep the user's questions, stated preferences and any facts they shared about themselves
+- Keep the key points of the assistant's answers, including names, numbers and conclusions
+- Drop greetings, filler and repetition
+- Write in plain prose, third person ("The user asked...", "The assistant explained...")
+- Stay under 200 words
+"""
+
+
+def build_summary_prompt(previous_summary, turns):
+    """
+    Merges the current summary and the messages that are dropping out of the
+    prompt into a single user prompt.
+
+    Args:
+        previous_summary: The existing summary, or None for the first one
+        turns: List of message dicts with 'role' and 'content', oldest first
+
+    Returns:
+        str: The combined user prompt
+    """
+    transcript = '\n\n'.join(f"{turn['role'].capitalize()}: {turn['content']}" for turn in turns)
+
+    if previous_summary:
+        return (
+            f"Current summary:\n{previous_summary}\n\n"
+            f"Update the summary to also cover these newer messages:\n{transcript}"
+        )
+
+    return f"Summarize these messages:\n{transcript}"
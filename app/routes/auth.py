@@ -1,9 +1,11 @@
 from flask import Blueprint, request, jsonify
-from werkzeug.security import generate_password_hash, check_password_hash
 from flask_jwt_extended import create_access_token
 from app import db
 from app.errors.exceptions import ConflictError, UnauthorizedError
 from app.models.user import User
+from app.services.db_session import release_connection
+from app.services.passwords import password_hasher
+from app.services.unit_of_work import unit_of_work
 from app.schemas.user_schema import register_schema, login_schema, user_response_schema
 
 auth_bp = Blueprint('auth', __name__, url_prefix='/auth')
@@ -20,8 +22,10 @@ def register():
     if User.query.filter_by(username=data['username']).first():
         raise ConflictError('Username already taken')
 
-    #3 Create new user with hashed password
-    new_user = User(email=data['email'], username=data['username'], password_hash=generate_password_hash(data['password'], method='pbkdf2:sha256'))
+    #3 Create new user with hashed password (hashed off the request worker, without holding a DB connection)
+    release_connection()
+    password_hash = password_hasher.hash(data['password'])
+    new_user = User(email=data['email'], username=data['username'], password_hash=password_hash)
     db.session.add(new_user)
     db.session.commit()
 
@@ -46,10 +50,18 @@ def login():
         # Don't leak whether email exists
         raise UnauthorizedError('Invalid email or password')
 
-    # 3. Verify password
-    if not check_password_hash(user.password_hash, data['password']):
+    # 3. Verify password (hashed off the request worker, without holding a DB connection)
+    password_hash = user.password_hash
+    release_connection()
+    if not password_hasher.verify(password_hash, data['password']):
         raise UnauthorizedError('Invalid email or password')
 
+    # Upgrade hashes made with older PASSWORD_HASH_METHOD settings while we have the plain password
+    if password_hasher.needs_rehash(password_hash):
+        new_hash = password_hasher.hash(data['password'])
+        with unit_of_work():
+            user.password_hash = new_hash
+
     # 4. Generate JWT token
     token = create_access_token(identity=str(user.id))
 
@@ -1,18 +1,30 @@
-from flask import Blueprint, request, jsonify
+import json
+from datetime import datetime
+from flask import Blueprint, Response, request, jsonify, stream_with_context
 from app import db
 from app.middlewares.auth import auth_required
 from app.schemas.conversation_schema import (
     start_conversation_schema,
     send_message_schema,
-    conversation_list_schema,
-    conversation_detail_schema,
 )
-from app.services.openai_services import call_openai_conversation
-from app.services.rate_limiter import (
-    check_rate_limit,
-    increment_request_count,
-    DAILY_LIMIT,
+from app.schemas.request_schemas import pagination_schema
+from app.schemas.row_serializers import (
+    CONVERSATION_DETAIL_COLUMNS,
+    CONVERSATION_LIST_COLUMNS,
+    MESSAGE_COLUMNS,
+    conversation_detail,
+    conversation_list_row,
 )
+from app.services.conversation_history import load_history, build_messages, count_tokens, save_summary
+from app.services.db_session import release_connection
+from app.services.etags import conversation_version, conversations_version, not_modified, request_etag, with_etag
+from app.services.failed_calls import settle_failed_call
+from app.services.fast_json import json_response
+from app.services.openai_services import call_openai_conversation, stream_openai_conversation
+from app.services.pagination import paginate_newest_first
+from app.services.rate_limiter import reserve_request, refund_request
+from app.services.token_usage import save_usage, take_pending
+from app.services.unit_of_work import unit_of_work
 from app.prompts.qa_prompt import QA_SYSTEM_PROMPT
 from app.models.conversation import Conversation
 from app.models.conversation_message import ConversationMessage
@@ -22,6 +34,7 @@ from app.errors.exceptions import (
     NotFoundError,
     RateLimitError,
     OpenAIError,
+    UpstreamUnavailableError,
 )
 
 conversation_bp = Blueprint('conversation', __name__, url_prefix='/conversation')
@@ -29,58 +42,156 @@ conversation_bp = Blueprint('conversation', __name__, url_prefix='/conversation'
 MAX_MESSAGES_PER_CONVERSATION = 5
 
 
+def _wants_stream():
+    """Clients opt into SSE with ?stream=true or an Accept: text/event-stream header."""
+    if request.args.get('stream', '').lower() in ('1', 'true'):
+        return True
+    return request.accept_mimetypes.best == 'text/event-stream'
+
+
+def _sse(data, event=None):
+    """Formats one Server-Sent Events frame."""
+    frame = f'event: {event}\n' if event else ''
+    return frame + f'data: {json.dumps(data)}\n\n'
+
+
+def _save_interrupted_reply(user_id, conversation_id, messages, parts):
+    """
+    Settles a stream the client disconnected from. The usage chunk only comes
+    at the end of a stream, so unless it already arrived the tokens are
+    estimated from the prompt and the part of the reply that was generated.
+    """
+    pending = take_pending()
+    if parts and not pending:
+        pending = {'conversation': (
+            1,
+            sum(count_tokens(message['content']) for message in messages),
+            count_tokens(''.join(parts)),
+        )}
+
+    with unit_of_work() as session:
+        if parts:
+            session.add(ConversationMessage(
+                conversation_id=conversation_id,
+                role='assistant',
+                content=''.join(parts)
+            ))
+        save_usage(user_id, pending)
+        if not parts:
+            refund_request(user_id)
+
+
+def _stream_reply(user_id, conversation_id, messages, messages_remaining):
+    """
+    Streams the assistant reply over SSE. The assembled reply is saved once the
+    upstream stream finishes; if it fails, the reserved request is refunded.
+    If the client disconnects mid-stream, the part it was sent is saved with
+    the tokens spent so far (or the request is refunded if nothing was sent).
+
+    Events: "start" (conversation id), unnamed frames with {"delta": ...},
+    then "done" on success or "error" if the upstream call fails.
+    """
+    # The generator runs after the request's session is torn down, so it only gets ids
+    def generate():
+        parts = []
+        stream = stream_openai_conversation(messages)
+        try:
+            yield _sse({'conversation_id': conversation_id}, event='start')
+            for delta in stream:
+                parts.append(delta)
+                yield _sse({'delta': delta})
+        except GeneratorExit:
+            # Client went away - stop the upstream call, then settle what was used
+            stream.close()
+            _save_interrupted_reply(user_id, conversation_id, messages, parts)
+            raise
+        except (OpenAIError, UpstreamUnavailableError) as e:
+            with unit_of_work():
+                save_usage(user_id)
+                refund_request(user_id)
+            error = {'error': e.message, 'status': e.status_code}
+            if isinstance(e, UpstreamUnavailableError):
+                error['retry_after'] = e.retry_after
+            yield _sse(error, event='error')
+            return
+
+        with unit_of_work() as session:
+            session.add(ConversationMessage(
+                conversation_id=conversation_id,
+                role='assistant',
+                content=''.join(parts)
+            ))
+            save_usage(user_id)
+
+        yield _sse({
+            'conversation_id': conversation_id,
+            'messages_remaining': messages_remaining
+        }, event='done')
+
+    return Response(
+        stream_with_context(generate()),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+
 @conversation_bp.route('/start', methods=['POST'])
 @auth_required
 def start_conversation(current_user):
     # 1. Validate request
     data = start_conversation_schema.load(request.get_json())
 
-    # 2. Check rate limit
-    allowed, remaining = check_rate_limit(current_user)
+    # 2. Reserve one request from the daily quota
+    allowed, remaining = reserve_request(current_user.id)
     if not allowed:
         raise RateLimitError('Daily request limit reached')
 
-    # 3. Create conversation
-    title = data['message'][:100]
-    conversation = Conversation(user_id=current_user.id, title=title)
-    db.session.add(conversation)
-    db.session.commit()
-
-    # 4. Save user message
-    user_msg = ConversationMessage(
-        conversation_id=conversation.id,
+    # 3. Prepare the conversation and user message (written after the OpenAI call)
+    started_at = datetime.utcnow()
+    conversation = Conversation(user_id=current_user.id, title=data['message'][:100], created_at=started_at)
+    conversation.messages.append(ConversationMessage(
         role='user',
-        content=data['message']
-    )
-    db.session.add(user_msg)
-    db.session.commit()
+        content=data['message'],
+        created_at=started_at
+    ))
 
-    # 5. Build messages list and call OpenAI
+    # 4. Build messages list and call OpenAI
     messages = [
         {"role": "system", "content": QA_SYSTEM_PROMPT},
         {"role": "user", "content": data['message']}
     ]
 
+    if _wants_stream():
+        # The client needs the conversation id up front, so save it before streaming
+        with unit_of_work() as session:
+            session.add(conversation)
+            session.flush()
+            conversation_id = conversation.id
+        return _stream_reply(current_user.id, conversation_id, messages, MAX_MESSAGES_PER_CONVERSATION - 1)
+
+    # Don't hold a DB connection while waiting on OpenAI
+    release_connection()
+
     try:
         reply = call_openai_conversation(messages)
     except Exception as e:
-        # Wrap OpenAI / network errors in a consistent app error
-        raise OpenAIError(str(e))
+        # Keep the user's message as before, and give the request back
+        settle_failed_call(current_user.id, e, lambda: db.session.add(conversation))
 
-    # 6. Save assistant reply
-    assistant_msg = ConversationMessage(
-        conversation_id=conversation.id,
+    # 5. Save conversation, user message and assistant reply in one commit
+    conversation.messages.append(ConversationMessage(
         role='assistant',
-        content=reply
-    )
-    db.session.add(assistant_msg)
-    db.session.commit()
-
-    # 7. Increment rate limit
-    increment_request_count(current_user)
+        content=reply,
+        created_at=datetime.utcnow()
+    ))
+    with unit_of_work() as session:
+        session.add(conversation)
+        session.flush()
+        conversation_id = conversation.id
+        save_usage(current_user.id)
 
     return jsonify({
-        'conversation_id': conversation.id,
+        'conversation_id': conversation_id,
         'reply': reply,
         'messages_remaining': MAX_MESSAGES_PER_CONVERSATION - 1
     }), 201
@@ -109,65 +220,96 @@ def send_message(current_user):
     if user_message_count >= MAX_MESSAGES_PER_CONVERSATION:
         raise BadRequestError('Conversation message limit reached')
 
-    # 4. Check rate limit
-    allowed, remaining = check_rate_limit(current_user)
+    # 4. Read the rolling summary and the messages after it
+    history = load_history(conversation)
+
+    # 5. Reserve one request from the daily quota
+    allowed, remaining = reserve_request(current_user.id)
     if not allowed:
         raise RateLimitError('Daily request limit reached')
 
-    # 5. Save user message
+    # The user message is written after the OpenAI call, together with the reply
+    conversation_id = data['conversation_id']
     user_msg = ConversationMessage(
-        conversation_id=conversation.id,
+        conversation_id=conversation_id,
         role='user',
-        content=data['message']
+        content=data['message'],
+        created_at=datetime.utcnow()
     )
-    db.session.add(user_msg)
-    db.session.commit()
+    messages_remaining = MAX_MESSAGES_PER_CONVERSATION - (user_message_count + 1)
 
-    # 6. Build full message history for OpenAI
-    messages = [{"role": "system", "content": QA_SYSTEM_PROMPT}]
-    for msg in conversation.messages:
-        messages.append({"role": msg.role, "content": msg.content})
+    # Don't hold a DB connection while waiting on OpenAI
+    release_connection()
+
+    # 6. Build the prompt within the token budget, folding older messages into the summary if needed
+    messages, summary_update = build_messages(QA_SYSTEM_PROMPT, history, data['message'])
+
+    if _wants_stream():
+        with unit_of_work() as session:
+            session.add(user_msg)
+            if summary_update:
+                save_summary(conversation_id, summary_update)
+            save_usage(current_user.id)
+        return _stream_reply(current_user.id, conversation_id, messages, messages_remaining)
 
     try:
         reply = call_openai_conversation(messages)
     except Exception as e:
-        raise OpenAIError(str(e))
-
-    # 7. Save assistant reply
-    assistant_msg = ConversationMessage(
-        conversation_id=conversation.id,
-        role='assistant',
-        content=reply
-    )
-    db.session.add(assistant_msg)
-    db.session.commit()
-
-    # 8. Increment rate limit
-    increment_request_count(current_user)
+        # Keep the user's message (and any new summary) as before, and give the request back
+        writes = [lambda: db.session.add(user_msg)]
+        if summary_update:
+            writes.append(lambda: save_summary(conversation_id, summary_update))
+        settle_failed_call(current_user.id, e, *writes)
+
+    # 7. Save user message, assistant reply, any new summary and token usage in one commit
+    with unit_of_work() as session:
+        if summary_update:
+            save_summary(conversation_id, summary_update)
+        save_usage(current_user.id)
+        session.add_all([
+            user_msg,
+            ConversationMessage(
+                conversation_id=conversation_id,
+                role='assistant',
+                content=reply,
+                created_at=datetime.utcnow()
+            ),
+        ])
 
     return jsonify({
-        'conversation_id': conversation.id,
+        'conversation_id': conversation_id,
         'reply': reply,
-        'messages_remaining': MAX_MESSAGES_PER_CONVERSATION - (user_message_count + 1)
+        'messages_remaining': messages_remaining
     }), 200
 
 
 @conversation_bp.route('/conversations', methods=['GET'])
 @auth_required
 def list_conversations(current_user):
-    conversations = Conversation.query.filter_by(
-        user_id=current_user.id
-    ).order_by(Conversation.created_at.desc()).all()
+    page = pagination_schema.load(request.args)
 
-    return jsonify({
-        'conversations': conversation_list_schema.dump(conversations)
-    }), 200
+    # Answer a poll from the version marker alone if nothing changed since
+    etag = request_etag(current_user.id, conversations_version(current_user.id))
+    unchanged = not_modified(etag)
+    if unchanged:
+        return unchanged
+
+    # Plain rows; message_count is a correlated COUNT in the same query - no per-conversation message loading
+    query = db.session.query(*CONVERSATION_LIST_COLUMNS).filter(Conversation.user_id == current_user.id)
+    conversations, next_cursor = paginate_newest_first(query, Conversation, page['limit'], page['cursor'])
+
+    return with_etag(json_response({
+        'conversations': [conversation_list_row(row) for row in conversations],
+        'next_cursor': next_cursor
+    }), etag), 200
 
 
 @conversation_bp.route('/conversations/<int:conversation_id>', methods=['GET'])
 @auth_required
 def get_conversation(current_user, conversation_id):
-    conversation = Conversation.query.get(conversation_id)
+    conversation = db.session.query(*CONVERSATION_DETAIL_COLUMNS).filter(
+        Conversation.id == conversation_id
+    ).first()
 
     if not conversation:
         raise NotFoundError('Conversation not found')
@@ -175,6 +317,16 @@ def get_conversation(current_user, conversation_id):
     if conversation.user_id != current_user.id:
         raise ForbiddenError('Not your conversation')
 
-    return jsonify({
-        'conversation': conversation_detail_schema.dump(conversation)
-    }), 200
\ No newline at end of file
+    # Ownership is checked first, so a 304 never confirms someone else's conversation
+    etag = request_etag(current_user.id, conversation_version(conversation_id))
+    unchanged = not_modified(etag)
+    if unchanged:
+        return unchanged
+
+    messages = db.session.query(*MESSAGE_COLUMNS).filter(
+        ConversationMessage.conversation_id == conversation_id
+    ).order_by(ConversationMessage.created_at, ConversationMessage.id).all()
+
+    return with_etag(json_response({
+        'conversation': conversation_detail(conversation, messages)
+    }), etag), 200
\ No newline at end of file
@@ -5,8 +5,12 @@ from app.middlewares.auth import auth_required
 from app.schemas.saved_item_schema import (
     save_item_schema,
     saved_item_response_schema,
-    saved_items_response_schema,
 )
+from app.schemas.request_schemas import pagination_schema
+from app.schemas.row_serializers import SAVED_ITEM_COLUMNS, saved_item_row
+from app.services.etags import favourites_version, not_modified, request_etag, with_etag
+from app.services.fast_json import json_response
+from app.services.pagination import paginate_newest_first
 from app.models.saved_item import SavedItem
 from app.errors.exceptions import (
     BadRequestError,
@@ -49,22 +53,31 @@ def add_favourite(current_user):
 @favourites_bp.route('/', methods=['GET'])
 @auth_required
 def get_favourites(current_user):
-    # Check for category filter
+    # Check for category filter and page position
     category = request.args.get('category')
+    page = pagination_schema.load(request.args)
 
-    query = SavedItem.query.filter_by(user_id=current_user.id)
+    # Plain rows, not ORM objects - serialized by saved_item_row() instead of the marshmallow schema
+    query = db.session.query(*SAVED_ITEM_COLUMNS).filter(SavedItem.user_id == current_user.id)
 
     if category:
         if category not in ['fact', 'quote']:
             raise BadRequestError('Category must be "fact" or "quote"')
-        query = query.filter_by(category=category)
+        query = query.filter(SavedItem.category == category)
 
-    items = query.order_by(SavedItem.created_at.desc()).all()
+    # Answer a poll from the version marker alone if nothing changed since
+    etag = request_etag(current_user.id, favourites_version(current_user.id, category))
+    unchanged = not_modified(etag)
+    if unchanged:
+        return unchanged
 
-    return jsonify({
-        'favourites': saved_items_response_schema.dump(items),
-        'count': len(items)
-    }), 200
+    items, next_cursor = paginate_newest_first(query, SavedItem, page['limit'], page['cursor'])
+
+    return with_etag(json_response({
+        'favourites': [saved_item_row(row) for row in items],
+        'count': len(items),
+        'next_cursor': next_cursor
+    }), etag), 200
 
 
 @favourites_bp.route('/<int:item_id>', methods=['DELETE'])
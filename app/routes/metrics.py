@@ -0,0 +1,28 @@
+import hmac
+from flask import Blueprint, Response, current_app, request
+from app.errors.exceptions import UnauthorizedError
+from app.services.metrics import render_metrics
+
+metrics_bp = Blueprint('metrics', __name__)
+
+
+def _may_scrape():
+    """True for clients in METRICS_ALLOWED_IPS, or with the METRICS_TOKEN bearer token."""
+    if request.remote_addr in current_app.config['METRICS_ALLOWED_IPS']:
+        return True
+    token = current_app.config['METRICS_TOKEN']
+    if not token:
+        return False
+    supplied = request.headers.get('Authorization', '')
+    return hmac.compare_digest(supplied.encode('utf-8'), f'Bearer {token}'.encode('utf-8'))
+
+
+@metrics_bp.route('/metrics', methods=['GET'])
+def get_metrics():
+    # Metrics reveal traffic and internals, so only Prometheus gets them
+    if not _may_scrape():
+        raise UnauthorizedError('Metrics require METRICS_TOKEN or an allowed IP')
+
+    # Prometheus scrape endpoint (aggregated across gunicorn workers when PROMETHEUS_MULTIPROC_DIR is set)
+    body, content_type = render_metrics()
+    return Response(body, content_type=content_type)
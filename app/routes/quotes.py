@@ -1,16 +1,14 @@
 from flask import Blueprint, request, jsonify
-from app import db
 from app.middlewares.auth import auth_required
-from app.schemas.request_schemas import topic_request_schema
-from app.services.openai_services import call_openai
-from app.services.rate_limiter import (
-    check_rate_limit,
-    increment_request_count,
-    DAILY_LIMIT,
-)
-from app.prompts.quotes_prompt import QUOTES_SYSTEM_PROMPT, build_quotes_prompt
-from app.models.searched_item import SearchedItem
-from app.errors.exceptions import RateLimitError, OpenAIError
+from app.schemas.request_schemas import topic_request_schema, batch_topic_request_schema
+from app.services.db_session import release_connection
+from app.services.failed_calls import settle_failed_call
+from app.services.generation import generate, generate_batch
+from app.services.rate_limiter import reserve_request, remaining_fields
+from app.services.search_log import search_log
+from app.services.token_usage import save_usage
+from app.services.unit_of_work import unit_of_work
+from app.errors.exceptions import RateLimitError
 
 
 quotes_bp = Blueprint('quotes', __name__, url_prefix='/quotes')
@@ -21,36 +19,56 @@ def get_quotes(current_user):
     # 1. Validate request body
     data = topic_request_schema.load(request.get_json())
 
-    # 2. Check rate limit
-    allowed, remaining = check_rate_limit(current_user)
+    # 2. Reserve one request from the daily quota
+    allowed, remaining = reserve_request(current_user.id)
     if not allowed:
         raise RateLimitError('Daily request limit reached')
 
     # 3. Build prompt and call OpenAI
     topic = data['topic']
     comment = data.get('comment')
-    user_prompt = build_quotes_prompt(topic, comment)
+
+    # Don't hold a DB connection while waiting on OpenAI
+    release_connection()
 
     try:
-        result = call_openai(QUOTES_SYSTEM_PROMPT, user_prompt)
+        quotes = generate('quotes', topic, comment)
     except Exception as e:
-        raise OpenAIError(str(e))
-
-    # 4. Increment request count (only after successful call)
-    increment_request_count(current_user)
+        settle_failed_call(current_user.id, e)
 
-    # 5. Save search to database
-    searched_item = SearchedItem(
-        user_id=current_user.id,
-        topic=topic.lower().strip(),
-        feature='quotes',
-    )
-    db.session.add(searched_item)
-    db.session.commit()
+    # 4. Log search (written to the database in the background) and record token usage
+    search_log.record(current_user.id, topic, 'quotes')
+    with unit_of_work():
+        tokens_spent = save_usage(current_user.id)
 
-    # 6. Return response
+    # 5. Return response
     return jsonify({
         'message': 'Quotes retrieved successfully',
-        'quotes': result.get('quotes', []),
-        'remaining_requests': DAILY_LIMIT - current_user.daily_request_count
-    }), 200
\ No newline at end of file
+        'quotes': quotes,
+        **remaining_fields(remaining, tokens_spent)
+    }), 200
+
+
+@quotes_bp.route('/batch', methods=['POST'])
+@auth_required
+def get_quotes_batch(current_user):
+    # 1. Validate request body
+    topics = batch_topic_request_schema.load(request.get_json())['topics']
+
+    # 2. Reserve one request per topic in a single statement
+    allowed, remaining = reserve_request(current_user.id, amount=len(topics))
+    if not allowed:
+        raise RateLimitError('Not enough daily requests left for this batch')
+
+    # Don't hold a DB connection while waiting on OpenAI
+    release_connection()
+
+    # 3. Generate all topics concurrently; failed topics are refunded
+    results, refunded, tokens_spent = generate_batch(current_user.id, 'quotes', topics)
+
+    # 4. Return per-topic results
+    return jsonify({
+        'message': 'Quotes batch processed',
+        'results': results,
+        **remaining_fields(remaining + refunded, tokens_spent)
+    }), 200
@@ -1,8 +1,7 @@
 from flask import Blueprint, jsonify, request
-from sqlalchemy import func
-from app import db
 from app.middlewares.auth import auth_required
-from app.models.searched_item import SearchedItem
+from app.services.etags import not_modified, request_etag, with_etag
+from app.services.trending import get_top_topics
 from app.errors.exceptions import BadRequestError
 
 
@@ -15,22 +14,20 @@ def get_trending(current_user):
     # get feature from query parameters
     feature = request.args.get('feature')
 
-    # build query to get trending items
-    query = db.session.query(
-        SearchedItem.topic,
-        func.count(SearchedItem.topic).label('count')
-    )
+    if feature and feature not in ['facts', 'quotes']:
+        raise BadRequestError('Feature must be "facts" or "quotes"')
 
-    if feature:
-        if feature not in ['facts', 'quotes']:
-            raise BadRequestError('Feature must be "facts" or "quotes"')
-        query = query.filter(SearchedItem.feature == feature)
-
-    trending = query.group_by(SearchedItem.topic).order_by(func.count(SearchedItem.topic).desc()).limit(10).all()
+    # read the top topics from the rollup table
+    trending = get_top_topics(feature)
 
+    # The top-N index read is the cheapest version marker there is - tag the rows themselves
+    etag = request_etag([[item.topic, item.count] for item in trending])
+    unchanged = not_modified(etag)
+    if unchanged:
+        return unchanged
 
     # 2. Return response
-    return jsonify({
+    return with_etag(jsonify({
         'trending': [{'topic': item.topic, 'count': item.count} for item in trending],
         'count': len(trending)
-    }), 200
\ No newline at end of file
+    }), etag), 200
@@ -0,0 +1,36 @@
+from datetime import date
+from flask import Blueprint, current_app, jsonify, request
+from app.middlewares.auth import auth_required
+from app.schemas.request_schemas import usage_query_schema
+from app.services.rate_limiter import DAILY_LIMIT
+from app.services.token_usage import get_daily_usage
+
+usage_bp = Blueprint('usage', __name__, url_prefix='/usage')
+
+@usage_bp.route('/', methods=['GET'])
+@auth_required
+def get_usage(current_user):
+    # 1. Validate query parameters
+    days = usage_query_schema.load(request.args)['days']
+
+    # 2. Read the daily token totals (newest first)
+    usage = get_daily_usage(current_user.id, days)
+
+    # 3. Describe today's quota in the unit it is enforced in
+    today = date.today()
+    if current_app.config['QUOTA_MODE'] == 'tokens':
+        limit = current_app.config['DAILY_TOKEN_LIMIT']
+        used = next((day['total_tokens'] for day in usage if day['date'] == today.isoformat()), 0)
+    else:
+        limit = DAILY_LIMIT
+        used = (current_user.daily_request_count or 0) if current_user.last_request_date == today else 0
+
+    return jsonify({
+        'quota': {
+            'mode': current_app.config['QUOTA_MODE'],
+            'limit': limit,
+            'used_today': used,
+            'remaining_today': max(limit - used, 0)
+        },
+        'days': usage
+    }), 200
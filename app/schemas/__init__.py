@@ -1,3 +1,3 @@
 from app.schemas.user_schema import register_schema, login_schema, user_response_schema
 from app.schemas.saved_item_schema import save_item_schema, saved_item_response_schema, saved_items_response_schema
-from app.schemas.request_schemas import topic_request_schema, qa_message_schema
\ No newline at end of file
+from app.schemas.request_schemas import topic_request_schema, batch_topic_request_schema, qa_message_schema, pagination_schema, usage_query_schema
\ No newline at end of file
@@ -23,22 +23,20 @@ class MessageResponseSchema(ma.SQLAlchemyAutoSchema):
 
 
 # For formatting a conversation in list view (no messages, just title + id)
+# Query with undefer(Conversation.message_count) so the count comes from SQL, not from loading messages
 class ConversationListSchema(ma.SQLAlchemyAutoSchema):
     class Meta:
         model = Conversation
-        exclude = ('user_id',)
+        exclude = ('user_id', 'summary', 'summarized_through_id')
 
-    message_count = fields.Method('get_message_count')
-
-    def get_message_count(self, obj):
-        return sum(1 for m in obj.messages if m.role == 'user')
+    message_count = fields.Integer()
 
 
 # For formatting a full conversation with all messages
 class ConversationDetailSchema(ma.SQLAlchemyAutoSchema):
     class Meta:
         model = Conversation
-        exclude = ('user_id',)
+        exclude = ('user_id', 'message_count', 'summary', 'summarized_through_id')
 
     messages = fields.Nested(MessageResponseSchema, many=True)
 
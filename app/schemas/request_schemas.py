@@ -1,5 +1,11 @@
 from app import ma
-from marshmallow import fields, validate
+from marshmallow import EXCLUDE, fields, validate
+
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+MAX_BATCH_TOPICS = 10
+DEFAULT_USAGE_DAYS = 7
+MAX_USAGE_DAYS = 31
 
 
 # For facts and quotes requests (same structure)
@@ -8,11 +14,37 @@ class TopicRequestSchema(ma.Schema):
     comment = fields.String(load_default=None, validate=validate.Length(max=500))
 
 
+# For batch facts and quotes requests - a list of topic requests
+class BatchTopicRequestSchema(ma.Schema):
+    topics = fields.List(
+        fields.Nested(TopicRequestSchema),
+        required=True,
+        validate=validate.Length(min=1, max=MAX_BATCH_TOPICS)
+    )
+
+
 # For Q&A message requests
 class QAMessageSchema(ma.Schema):
     conversation_id = fields.String(required=True)
     message = fields.String(required=True, validate=validate.Length(min=1, max=1000))
 
 
+# For paginated list endpoints (?limit=&cursor=)
+class PaginationSchema(ma.Schema):
+    class Meta:
+        unknown = EXCLUDE  # Other query params (e.g., category) are handled by the route
+
+    limit = fields.Integer(load_default=DEFAULT_PAGE_SIZE, validate=validate.Range(min=1, max=MAX_PAGE_SIZE))
+    cursor = fields.String(load_default=None)
+
+
+# For the usage report (?days=)
+class UsageQuerySchema(ma.Schema):
+    days = fields.Integer(load_default=DEFAULT_USAGE_DAYS, validate=validate.Range(min=1, max=MAX_USAGE_DAYS))
+
+
 topic_request_schema = TopicRequestSchema()
-qa_message_schema = QAMessageSchema()
\ No newline at end of file
+batch_topic_request_schema = BatchTopicRequestSchema()
+qa_message_schema = QAMessageSchema()
+pagination_schema = PaginationSchema()
+usage_query_schema = UsageQuerySchema()
\ No newline at end of file
@@ -0,0 +1,94 @@
+from app.models.conversation import Conversation
+from app.models.conversation_message import ConversationMessage
+from app.models.saved_item import SavedItem
+
+# Precompiled response shapes for the hot read endpoints. Each *_COLUMNS tuple
+# is selected as plain rows (no ORM objects), and the matching function builds
+# exactly the dict its marshmallow schema would dump - same keys, same ISO
+# datetime strings - so json_response() gives byte-identical output.
+# Keep them in sync with the schemas when a model gains a field.
+
+
+def _iso(value):
+    return value.isoformat() if value is not None else None
+
+
+# SavedItemResponseSchema
+SAVED_ITEM_COLUMNS = (
+    SavedItem.id,
+    SavedItem.category,
+    SavedItem.content,
+    SavedItem.author,
+    SavedItem.topic,
+    SavedItem.created_at,
+)
+
+
+def saved_item_row(row):
+    item_id, category, content, author, topic, created_at = row
+    return {
+        'author': author,
+        'category': category,
+        'content': content,
+        'created_at': _iso(created_at),
+        'id': item_id,
+        'topic': topic,
+    }
+
+
+# ConversationListSchema
+CONVERSATION_LIST_COLUMNS = (
+    Conversation.id,
+    Conversation.title,
+    Conversation.created_at,
+    Conversation.message_count,
+)
+
+
+def conversation_list_row(row):
+    conversation_id, title, created_at, message_count = row
+    return {
+        'created_at': _iso(created_at),
+        'id': conversation_id,
+        'message_count': message_count,
+        'title': title,
+    }
+
+
+# ConversationDetailSchema (the conversation) and MessageResponseSchema (its messages)
+CONVERSATION_DETAIL_COLUMNS = (
+    Conversation.id,
+    Conversation.user_id,
+    Conversation.title,
+    Conversation.created_at,
+)
+MESSAGE_COLUMNS = (
+    ConversationMessage.id,
+    ConversationMessage.role,
+    ConversationMessage.content,
+    ConversationMessage.created_at,
+)
+
+
+def message_row(row):
+    message_id, role, content, created_at = row
+    return {
+        'content': content,
+        'created_at': _iso(created_at),
+        'id': message_id,
+        'role': role,
+    }
+
+
+def conversation_detail(conversation, messages):
+    """
+    Args:
+        conversation: A CONVERSATION_DETAIL_COLUMNS row
+        messages: MESSAGE_COLUMNS rows, oldest first
+    """
+    return {
+        'created_at': _iso(conversation.created_at),
+        'id': conversation.id,
+        'messages': [message_row(row) for row in messages],
+        'title': conversation.title,
+    }
@@ -0,0 +1,228 @@
+import fcntl
+import json
+import math
+import os
+import threading
+import time
+from contextlib import contextmanager
+from app.errors.exceptions import UpstreamUnavailableError
+from app.services.llm_provider import is_retryable
+from app.services.metrics import CIRCUIT_REJECTIONS, CIRCUIT_TRANSITIONS
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+# Retry-After for calls turned away while the half-open probes are running
+HALF_OPEN_RETRY_AFTER = 5
+
+
+def _initial_state():
+    return {'state': CLOSED, 'opened_at': 0, 'window': [], 'probes': [], 'probe_successes': 0}
+
+
+class _LocalStore:
+    """Breaker state for this worker process only."""
+
+    def __init__(self):
+        self._state = _initial_state()
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def transaction(self):
+        with self._lock:
+            yield self._state
+
+
+class _FileStore:
+    """
+    Breaker state in a JSON file, read and rewritten under an exclusive flock,
+    so every worker process on the host sees the same breaker.
+    """
+
+    def __init__(self, path):
+        self.path = path
+
+    @contextmanager
+    def transaction(self):
+        with open(self.path, 'a+', encoding='utf-8') as f:
+            # Held only for a read-modify-write, never across an upstream call
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                f.seek(0)
+                try:
+                    state = json.loads(f.read() or 'null') or _initial_state()
+                except ValueError:
+                    state = _initial_state()
+                yield state
+                f.seek(0)
+                f.truncate()
+                json.dump(state, f)
+                f.flush()
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+
+class CircuitBreaker:
+    """
+    Fails LLM calls fast while the provider is unhealthy, instead of letting
+    every request wait out its own failing call and tie up a worker.
+
+    - Closed: calls go through. Outcomes are counted over the last
+      CIRCUIT_BREAKER_WINDOW seconds; once there are at least
+      CIRCUIT_BREAKER_MIN_CALLS and CIRCUIT_BREAKER_FAILURE_RATIO of them failed,
+      the breaker opens. Retryable errors (timeouts, connection errors, 429s,
+      5xx) and calls slower than CIRCUIT_BREAKER_SLOW_CALL count as failures.
+    - Open: calls raise UpstreamUnavailableError (503 with Retry-After) without
+      reaching the provider, for CIRCUIT_BREAKER_OPEN_SECONDS.
+    - Half-open: up to CIRCUIT_BREAKER_PROBES trial calls go through. If they
+      all succeed the breaker closes; any failure opens it again.
+
+    With CIRCUIT_BREAKER_STATE_DIR set, the state is kept in a file there and
+    shared by all worker processes on the host.
+    """
+
+    def __init__(self):
+        self.enabled = True
+        self.failure_ratio = 0.5
+        self.min_calls = 10
+        self.window = 30
+        self.slow_call = 15
+        self.open_seconds = 30
+        self.probes = 2
+        self.probe_timeout = 60
+        self._store = _LocalStore()
+
+    def init_app(self, app):
+        config = app.config
+        self.enabled = config['CIRCUIT_BREAKER_ENABLED']
+        self.failure_ratio = config['CIRCUIT_BREAKER_FAILURE_RATIO']
+        self.min_calls = config['CIRCUIT_BREAKER_MIN_CALLS']
+        self.window = config['CIRCUIT_BREAKER_WINDOW']
+        self.slow_call = config['CIRCUIT_BREAKER_SLOW_CALL']
+        self.open_seconds = config['CIRCUIT_BREAKER_OPEN_SECONDS']
+        self.probes = config['CIRCUIT_BREAKER_PROBES']
+        # A probe whose worker died never reports back - stop waiting for it after this long
+        self.probe_timeout = config['OPENAI_TIMEOUT']
+
+        state_dir = config.get('CIRCUIT_BREAKER_STATE_DIR')
+        if state_dir:
+            os.makedirs(state_dir, exist_ok=True)
+            self._store = _FileStore(os.path.join(state_dir, 'openai.json'))
+        else:
+            self._store = _LocalStore()
+        app.extensions['circuit_breaker'] = self
+
+    @staticmethod
+    def _enter(state, new_state, now):
+        state['state'] = new_state
+        state['window'] = []
+        state['probes'] = []
+        state['probe_successes'] = 0
+        if new_state == OPEN:
+            state['opened_at'] = now
+        CIRCUIT_TRANSITIONS.labels(new_state).inc()
+
+    def _acquire(self):
+        """
+        Lets a call through or raises UpstreamUnavailableError.
+
+        Returns:
+            float or None: The probe's start time if the call is a half-open probe
+        """
+        now = time.time()
+        with self._store.transaction() as state:
+            if state['state'] == OPEN:
+                reopens_at = state['opened_at'] + self.open_seconds
+                if now < reopens_at:
+                    CIRCUIT_REJECTIONS.inc()
+                    raise UpstreamUnavailableError(retry_after=max(math.ceil(reopens_at - now), 1))
+                self._enter(state, HALF_OPEN, now)
+
+            if state['state'] == HALF_OPEN:
+                state['probes'] = [started for started in state['probes'] if started > now - self.probe_timeout]
+                if len(state['probes']) + state['probe_successes'] >= self.probes:
+                    CIRCUIT_REJECTIONS.inc()
+                    raise UpstreamUnavailableError(retry_after=HALF_OPEN_RETRY_AFTER)
+                state['probes'].append(now)
+                return now
+
+        return None
+
+    def _record(self, probe, failed):
+        now = time.time()
+        with self._store.transaction() as state:
+            if probe is not None:
+                if state['state'] != HALF_OPEN or probe not in state['probes']:
+                    return
+                state['probes'].remove(probe)
+                if failed:
+                    self._enter(state, OPEN, now)
+                else:
+                    state['probe_successes'] += 1
+                    if state['probe_successes'] >= self.probes:
+                        self._enter(state, CLOSED, now)
+                return
+
+            # Calls that started before the breaker opened don't count any more
+            if state['state'] != CLOSED:
+                return
+
+            # One [second, calls, failures] bucket per second of the window
+            second = int(now)
+            window = [bucket for bucket in state['window'] if bucket[0] > second - self.window]
+            if window and window[-1][0] == second:
+                window[-1][1] += 1
+                window[-1][2] += int(failed)
+            else:
+                window.append([second, 1, int(failed)])
+            state['window'] = window
+
+            calls = sum(bucket[1] for bucket in window)
+            failures = sum(bucket[2] for bucket in window)
+            if calls >= self.min_calls and failures >= calls * self.failure_ratio:
+                self._enter(state, OPEN, now)
+
+    def _release(self, probe):
+        if probe is None:
+            return
+        with self._store.transaction() as state:
+            if probe in state['probes']:
+                state['probes'].remove(probe)
+
+    @contextmanager
+    def guard(self, count_slow=True):
+        """
+        Wraps one logical upstream call (retries included).
+
+        Args:
+            count_slow: Count a successful call slower than CIRCUIT_BREAKER_SLOW_CALL
+                        as a failure (off for streams, which are long by design)
+
+        Raises:
+            UpstreamUnavailableError: If the breaker is open
+        """
+        if not self.enabled:
+            yield
+            return
+
+        probe = self._acquire()
+        started = time.monotonic()
+        try:
+            yield
+        except Exception as e:
+            self._record(probe, failed=is_retryable(e))
+            raise
+        except BaseException:
+            # e.g. a streaming client disconnected - says nothing about the provider
+            self._release(probe)
+            raise
+        self._record(probe, failed=count_slow and time.monotonic() - started > self.slow_call)
+
+    def state(self):
+        """Returns the current state: "closed", "open" or "half_open"."""
+        with self._store.transaction() as state:
+            return state['state']
+
+
+circuit_breaker = CircuitBreaker()
@@ -0,0 +1,60 @@
+import gzip
+from flask import request
+
+try:
+    import brotli
+except ImportError:  # gzip only
+    brotli = None
+
+# Fast settings - bodies are compressed per request, not ahead of time
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 4
+
+
+def _choose_encoding():
+    """Picks br or gzip from Accept-Encoding (br when equally acceptable), or None."""
+    accepted = request.accept_encodings
+    gzip_quality = accepted['gzip']
+    if brotli is not None and accepted['br'] and accepted['br'] >= gzip_quality:
+        return 'br'
+    return 'gzip' if gzip_quality else None
+
+
+def register_compression(app):
+    """
+    Compresses JSON responses of at least COMPRESSION_MIN_SIZE bytes with
+    brotli (if the brotli package is installed) or gzip, as the client accepts.
+    Streams (SSE) and small bodies are sent as they are.
+
+    A strong ETag gets an encoding suffix ("-gzip"/"-br"), since the bytes
+    differ per encoding; services/etags.py accepts every variant.
+    """
+    if not app.config['COMPRESSION_ENABLED']:
+        return
+    min_size = app.config['COMPRESSION_MIN_SIZE']
+
+    @app.after_request
+    def _compress(response):
+        if (response.status_code != 200 or response.is_streamed or response.direct_passthrough
+                or response.mimetype != 'application/json' or 'Content-Encoding' in response.headers):
+            return response
+
+        body = response.get_data()
+        if len(body) < min_size:
+            return response
+
+        response.vary.add('Accept-Encoding')
+        encoding = _choose_encoding()
+        if encoding is None:
+            return response
+
+        if encoding == 'br':
+            response.set_data(brotli.compress(body, quality=BROTLI_QUALITY))
+        else:
+            response.set_data(gzip.compress(body, compresslevel=GZIP_LEVEL))
+        response.headers['Content-Encoding'] = encoding
+
+        etag, weak = response.get_etag()
+        if etag and not weak:
+            response.set_etag(f'{etag}-{encoding}')
+        return response
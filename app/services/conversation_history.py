@@ -0,0 +1,173 @@
+import math
+import threading
+from flask import current_app
+from sqlalchemy import update
+from app import db
+from app.errors.exceptions import OpenAIError, UpstreamUnavailableError
+from app.models.conversation import Conversation
+from app.models.conversation_message import ConversationMessage
+from app.prompts.summary_prompt import SUMMARY_SYSTEM_PROMPT, build_summary_prompt
+from app.services.openai_services import call_openai_conversation
+
+# Per-message framing tokens the chat format adds on top of the content
+MESSAGE_OVERHEAD_TOKENS = 4
+
+_encoding = None
+_encoding_unavailable = False
+_encoding_lock = threading.Lock()
+
+
+def _get_encoding():
+    """
+    Returns the tiktoken encoding for OPENAI_MODEL, or None if it can't be
+    loaded (tiktoken fetches encoding files on first use, which fails offline).
+    """
+    global _encoding, _encoding_unavailable
+    if _encoding is None and not _encoding_unavailable:
+        # One thread loads it (or logs the fallback); the rest wait and reuse the outcome
+        with _encoding_lock:
+            if _encoding is None and not _encoding_unavailable:
+                try:
+                    import tiktoken
+                    try:
+                        _encoding = tiktoken.encoding_for_model(current_app.config['OPENAI_MODEL'])
+                    except KeyError:
+                        _encoding = tiktoken.get_encoding('o200k_base')
+                except Exception:
+                    current_app.logger.warning('tiktoken encoding unavailable, estimating token counts')
+                    _encoding_unavailable = True
+    return _encoding
+
+
+def count_tokens(text):
+    """Counts the tokens in a string locally (about 4 characters per token if tiktoken is unavailable)."""
+    if not text:
+        return 0
+    encoding = _get_encoding()
+    if encoding is None:
+        return math.ceil(len(text) / 4)
+    return len(encoding.encode(text))
+
+
+def _message_tokens(message):
+    return count_tokens(message['content']) + MESSAGE_OVERHEAD_TOKENS
+
+
+def history_query(conversation_id, through_id):
+    """Builds the load_history() query (kept separate so the query plan check can EXPLAIN it)."""
+    return db.session.query(
+        ConversationMessage.id, ConversationMessage.role, ConversationMessage.content
+    ).filter(
+        ConversationMessage.conversation_id == conversation_id,
+        ConversationMessage.id > through_id
+    ).order_by(
+        ConversationMessage.created_at, ConversationMessage.id
+    )
+
+
+def load_history(conversation):
+    """
+    Reads what build_messages() needs while the DB connection is still held:
+    the rolling summary and only the messages that came after it.
+
+    Args:
+        conversation: The Conversation being continued
+
+    Returns:
+        dict: 'summary', 'summarized_through_id' and 'turns' (oldest first)
+    """
+    through_id = conversation.summarized_through_id or 0
+    rows = history_query(conversation.id, through_id).all()
+
+    return {
+        'summary': conversation.summary,
+        'summarized_through_id': through_id,
+        'turns': [{'id': row.id, 'role': row.role, 'content': row.content} for row in rows],
+    }
+
+
+def _assemble(system_prompt, summary, turns, new_message):
+    messages = [{"role": "system", "content": system_prompt}]
+    if summary:
+        messages.append({"role": "system", "content": f"Summary of the earlier conversation:\n{summary}"})
+    messages.extend({"role": turn['role'], "content": turn['content']} for turn in turns)
+    messages.append(new_message)
+    return messages
+
+
+def _summarize(previous_summary, turns):
+    messages = [
+        {"role": "system", "content": SUMMARY_SYSTEM_PROMPT},
+        {"role": "user", "content": build_summary_prompt(previous_summary, turns)},
+    ]
+    return call_openai_conversation(
+        messages, max_tokens=current_app.config['HISTORY_SUMMARY_MAX_TOKENS'], feature='summary'
+    )
+
+
+def build_messages(system_prompt, history, message):
+    """
+    Builds the prompt for the next turn within HISTORY_TOKEN_BUDGET.
+
+    While the summary, the turns after it and the new message fit in the
+    budget, everything is sent verbatim. Once they don't, older turns are
+    folded into the rolling summary (one extra upstream call) until the
+    verbatim turns fit in HISTORY_RECENT_TOKENS. That leaves headroom, so the
+    summary is only refreshed every few turns rather than on every message.
+
+    Args:
+        system_prompt: The feature's system prompt
+        history: Output of load_history()
+        message: The user's new message
+
+    Returns:
+        tuple: (messages: list for the upstream call,
+                summary_update: dict for save_summary(), or None if unchanged)
+    """
+    config = current_app.config
+    summary = history['summary']
+    turns = history['turns']
+    new_message = {"role": "user", "content": message}
+
+    used = count_tokens(summary) + _message_tokens(new_message)
+    if used + sum(_message_tokens(turn) for turn in turns) <= config['HISTORY_TOKEN_BUDGET']:
+        return _assemble(system_prompt, summary, turns, new_message), None
+
+    # Keep the most recent turns that fit, starting on a user message
+    kept_tokens = _message_tokens(new_message)
+    split = len(turns)
+    while split > 0:
+        cost = _message_tokens(turns[split - 1])
+        if kept_tokens + cost > config['HISTORY_RECENT_TOKENS']:
+            break
+        kept_tokens += cost
+        split -= 1
+    while split < len(turns) and turns[split]['role'] != 'user':
+        split += 1
+
+    folded, kept = turns[:split], turns[split:]
+    if not folded:
+        return _assemble(system_prompt, summary, kept, new_message), None
+
+    try:
+        summary = _summarize(summary, folded)
+    except (OpenAIError, UpstreamUnavailableError) as e:
+        # Answering matters more than context - drop the old turns and retry the summary next time
+        current_app.logger.warning('Conversation summary failed: %s', e.message)
+        return _assemble(system_prompt, summary, kept, new_message), None
+
+    summary_update = {'summary': summary, 'summarized_through_id': folded[-1]['id']}
+    return _assemble(system_prompt, summary, kept, new_message), summary_update
+
+
+def save_summary(conversation_id, summary_update):
+    """
+    Stores a summary produced by build_messages(). Does not commit - run it
+    inside the request's unit_of_work().
+    """
+    db.session.execute(
+        update(Conversation)
+        .where(Conversation.id == conversation_id)
+        .values(**summary_update)
+        .execution_options(synchronize_session=False)
+    )
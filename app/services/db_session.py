@@ -0,0 +1,21 @@
+from flask import current_app
+from app import db
+
+
+def release_connection():
+    """
+    Ends the current transaction so its pooled DB connection goes back to the pool.
+    Call this right before a slow upstream call - otherwise every in-flight OpenAI
+    request holds a connection open doing nothing, and under a gevent worker the
+    pool runs out long before the workers do.
+
+    Never commits: writes belong in a unit_of_work(). Pending changes left in
+    the session are rolled back, and logged as the bug they are.
+    """
+    session = db.session
+    if session.new or session.dirty or session.deleted:
+        current_app.logger.warning(
+            'release_connection() discarding uncommitted changes (%d new, %d dirty, %d deleted)',
+            len(session.new), len(session.dirty), len(session.deleted)
+        )
+    session.rollback()
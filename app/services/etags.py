@@ -0,0 +1,114 @@
+import hashlib
+import json
+from flask import Response, request
+from sqlalchemy import func
+from app import db
+from app.models.conversation import Conversation
+from app.models.conversation_message import ConversationMessage
+from app.models.saved_item import SavedItem
+
+# Part of every ETag - bump it when a response format changes, so clients
+# don't keep getting 304s for bodies in the old format
+ETAG_FORMAT_VERSION = 1
+
+# Suffixes compression adds to a strong ETag (see services/compression.py)
+ENCODING_SUFFIXES = ('', '-gzip', '-br')
+
+
+def request_etag(*markers):
+    """
+    Builds a strong ETag for the current GET from the path, the query string
+    and version markers that change whenever the response body would.
+
+    Args:
+        *markers: JSON-serializable values, e.g. the user id and favourites_version()
+
+    Returns:
+        str: The ETag value (without quotes)
+    """
+    parts = [ETAG_FORMAT_VERSION, request.path, sorted(request.args.items(multi=True)), markers]
+    raw = json.dumps(parts, default=str, separators=(',', ':'))
+    return hashlib.sha256(raw.encode('utf-8')).hexdigest()[:32]
+
+
+def not_modified(etag):
+    """
+    Answers If-None-Match when the client already has this version (in any
+    content encoding).
+
+    Returns:
+        Response or None: A 304 to return from the route, or None to build the body
+    """
+    for suffix in ENCODING_SUFFIXES:
+        if request.if_none_match.contains(etag + suffix):
+            response = Response(status=304)
+            response.set_etag(etag + suffix)
+            response.headers['Cache-Control'] = 'private, no-cache'
+            return response
+    return None
+
+
+def with_etag(response, etag):
+    """Tags a response so clients can revalidate it with If-None-Match."""
+    response.set_etag(etag)
+    # Per-user data: browsers may keep it but must revalidate, shared caches must not store it
+    response.headers['Cache-Control'] = 'private, no-cache'
+    return response
+
+
+def favourites_version_query(user_id, category=None):
+    """Builds the favourites_version() query (kept separate so the query plan check can EXPLAIN it)."""
+    query = db.session.query(
+        func.count(SavedItem.id), func.max(SavedItem.id), func.max(SavedItem.created_at)
+    ).filter(
+        SavedItem.user_id == user_id
+    )
+    if category:
+        query = query.filter(SavedItem.category == category)
+    return query
+
+
+def favourites_version(user_id, category=None):
+    """
+    (count, max id, max created_at) of the user's saved items - changes on
+    every add or delete. SQLite can hand a deleted row's id to the next insert,
+    so deleting the newest item and adding another keeps count and max id the
+    same; the newer created_at still tells them apart.
+    """
+    return list(favourites_version_query(user_id, category).one())
+
+
+def conversations_version_query(user_id):
+    """Builds the conversations_version() query (kept separate so the query plan check can EXPLAIN it)."""
+    return db.session.query(
+        func.count(func.distinct(Conversation.id)),
+        func.max(Conversation.id),
+        func.max(ConversationMessage.id),
+    ).select_from(Conversation).outerjoin(
+        ConversationMessage, ConversationMessage.conversation_id == Conversation.id
+    ).filter(
+        Conversation.user_id == user_id
+    )
+
+
+def conversations_version(user_id):
+    """
+    (conversation count, max conversation id, max message id) for the user -
+    conversations and messages are only ever appended, so this changes
+    whenever the list (titles, message counts) does.
+    """
+    return list(conversations_version_query(user_id).one())
+
+
+def conversation_version_query(conversation_id):
+    """Builds the conversation_version() query (kept separate so the query plan check can EXPLAIN it)."""
+    return db.session.query(
+        func.count(ConversationMessage.id), func.max(ConversationMessage.id)
+    ).filter(
+        ConversationMessage.conversation_id == conversation_id
+    )
+
+
+def conversation_version(conversation_id):
+    """(message count, max message id) of one conversation."""
+    return list(conversation_version_query(conversation_id).one())
@@ -0,0 +1,34 @@
+from app.errors.exceptions import OpenAIError, UpstreamUnavailableError
+from app.services.rate_limiter import refund_request
+from app.services.token_usage import save_usage
+from app.services.unit_of_work import unit_of_work
+
+
+def settle_failed_call(user_id, exc, *extra_writes):
+    """
+    Settles a failed upstream call and raises the error the route should return.
+
+    Records the tokens used so far and gives the reserved request back (only
+    successful calls count against the quota), together with any writes the
+    route still wants kept, in one commit.
+
+    Args:
+        user_id: The caller's user id
+        exc: The exception the upstream call raised
+        *extra_writes: Callables run inside the same unit of work
+            (e.g., adding the user's message so it isn't lost)
+
+    Raises:
+        UpstreamUnavailableError: Re-raised as-is, keeping the 503 and Retry-After
+            when the circuit breaker is open
+        OpenAIError: For any other failure
+    """
+    with unit_of_work():
+        for write in extra_writes:
+            write()
+        save_usage(user_id)
+        refund_request(user_id)
+
+    if isinstance(exc, UpstreamUnavailableError):
+        raise exc
+    raise OpenAIError(str(exc))
@@ -0,0 +1,38 @@
+import json
+from flask import current_app, jsonify
+
+try:
+    import orjson
+except ImportError:  # stdlib json only
+    orjson = None
+
+
+def _default_settings(provider):
+    """True if the app's JSON provider is configured the way json_response() reproduces."""
+    compact = provider.compact if provider.compact is not None else not current_app.debug
+    return provider.sort_keys and provider.ensure_ascii and compact
+
+
+def json_response(payload):
+    """
+    Drop-in for jsonify(payload) that produces byte-identical output faster.
+
+    The payload must already be plain JSON types (see schemas/row_serializers.py).
+    orjson encodes it; because orjson can't escape non-ASCII text (or DEL) the
+    way jsonify does (ensure_ascii), such bodies are re-encoded with the
+    stdlib instead. With non-default JSON settings (debug indenting,
+    unsorted keys, ...) this simply calls jsonify().
+    """
+    provider = current_app.json
+    if not _default_settings(provider):
+        return jsonify(payload)
+
+    body = None
+    if orjson is not None:
+        body = orjson.dumps(payload, option=orjson.OPT_SORT_KEYS | orjson.OPT_APPEND_NEWLINE)
+        if not body.isascii() or b'\x7f' in body:
+            body = None
+    if body is None:
+        body = json.dumps(payload, sort_keys=True, separators=(',', ':')) + '\n'
+
+    return current_app.response_class(body, mimetype=provider.mimetype)
@@ -0,0 +1,102 @@
+from concurrent.futures import ThreadPoolExecutor
+from flask import current_app
+from app.errors.exceptions import AppError
+from app.prompts.facts_prompt import FACTS_SYSTEM_PROMPT, build_facts_prompt
+from app.prompts.quotes_prompt import QUOTES_SYSTEM_PROMPT, build_quotes_prompt
+from app.services.db_session import release_connection
+from app.services.generation_store import get_generation
+from app.services.openai_services import call_openai
+from app.services.rate_limiter import refund_request
+from app.services.search_log import search_log
+from app.services.token_usage import merge_pending, save_usage, take_pending
+from app.services.unit_of_work import unit_of_work
+
+# feature -> (system prompt, user prompt builder). The response JSON key matches the feature name.
+FEATURES = {
+    'facts': (FACTS_SYSTEM_PROMPT, build_facts_prompt),
+    'quotes': (QUOTES_SYSTEM_PROMPT, build_quotes_prompt),
+}
+
+
+def generate(feature, topic, comment=None):
+    """
+    Returns facts or quotes for a topic. Without a comment, a fresh pre-warmed
+    result for the topic is used if there is one (see services/prewarm.py);
+    otherwise this calls OpenAI.
+
+    Args:
+        feature: "facts" or "quotes"
+        topic: The subject (e.g., "black holes")
+        comment: Optional instruction (e.g., "make it beginner friendly")
+
+    Returns:
+        list: The generated facts or quotes
+    """
+    if not comment:
+        items = get_generation(feature, topic)
+        # Don't hold the connection the lookup took while waiting on OpenAI
+        release_connection()
+        if items is not None:
+            return items
+    return generate_upstream(feature, topic, comment)
+
+
+def generate_upstream(feature, topic, comment=None):
+    """Builds the prompt for a feature and calls OpenAI (through the response cache)."""
+    system_prompt, build_prompt = FEATURES[feature]
+    result = call_openai(system_prompt, build_prompt(topic, comment), feature=feature)
+    return result.get(feature, [])
+
+
+def generate_batch(user_id, feature, topics):
+    """
+    Generates several topics concurrently for one user, whose quota was already
+    reserved for every topic. Upstream calls run on a bounded thread pool
+    (BATCH_MAX_CONCURRENCY). Afterwards, successful searches go to the search
+    log buffer, and token usage is saved and failed topics refunded in one transaction.
+
+    Args:
+        user_id: The requesting user's id
+        feature: "facts" or "quotes"
+        topics: List of dicts with 'topic' and optional 'comment'
+
+    Returns:
+        tuple: (results: list of per-topic dicts, refunded: int - requests given back,
+                tokens_spent: int - tokens the batch used)
+    """
+    app = current_app._get_current_object()
+
+    def run(item):
+        # Each worker thread needs its own app context for config and the cache
+        # Token usage is tracked on that context, so hand it back to be saved with the batch
+        with app.app_context():
+            try:
+                return generate(feature, item['topic'], item.get('comment')), None, take_pending()
+            except AppError as e:
+                return None, e.message, take_pending()
+            except Exception as e:
+                return None, str(e), take_pending()
+
+    max_workers = min(app.config['BATCH_MAX_CONCURRENCY'], len(topics))
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        outcomes = list(pool.map(run, topics))
+
+    results = []
+    succeeded = []
+    for item, (items, error, _) in zip(topics, outcomes):
+        if error is None:
+            results.append({'topic': item['topic'], feature: items})
+            succeeded.append((user_id, item['topic'], feature))
+        else:
+            results.append({'topic': item['topic'], 'error': error})
+
+    search_log.record_many(succeeded)
+
+    failed = len(topics) - len(succeeded)
+    refunded = 0
+    with unit_of_work():
+        tokens_spent = save_usage(user_id, merge_pending(*(usage for _, _, usage in outcomes)))
+        if failed:
+            refunded = refund_request(user_id, failed)
+
+    return results, refunded, tokens_spent
@@ -0,0 +1,81 @@
+import json
+from datetime import datetime, timedelta
+from flask import current_app
+from app import db
+from app.models.prewarmed_generation import PrewarmedGeneration
+from app.services.openai_services import model_key
+from app.services.trending import normalize_topic
+from app.services.upsert import upsert
+
+
+def generation_query(feature, topic, cutoff):
+    """Builds the get_generation() query (kept separate so the query plan check can EXPLAIN it)."""
+    return db.session.query(PrewarmedGeneration.content).filter(
+        PrewarmedGeneration.feature == feature,
+        PrewarmedGeneration.topic == normalize_topic(topic),
+        PrewarmedGeneration.model == model_key(),
+        PrewarmedGeneration.generated_at >= cutoff
+    )
+
+
+def get_generation(feature, topic):
+    """
+    Returns pre-generated facts/quotes for a topic if they're younger than
+    PREWARM_FRESHNESS and were made by the current provider and model.
+
+    Args:
+        feature: "facts" or "quotes"
+        topic: The topic as the user typed it
+
+    Returns:
+        list or None: The stored items, or None if there's no fresh entry
+    """
+    config = current_app.config
+    if not config['PREWARM_SERVE']:
+        return None
+
+    cutoff = datetime.utcnow() - timedelta(seconds=config['PREWARM_FRESHNESS'])
+    content = generation_query(feature, topic, cutoff).scalar()
+    return json.loads(content) if content is not None else None
+
+
+def fresh_topics(feature, topics, since):
+    """Returns which of `topics` (normalized) have an entry from the current model generated at or after `since`."""
+    rows = db.session.query(PrewarmedGeneration.topic).filter(
+        PrewarmedGeneration.feature == feature,
+        PrewarmedGeneration.topic.in_(topics),
+        PrewarmedGeneration.model == model_key(),
+        PrewarmedGeneration.generated_at >= since
+    ).all()
+    return {row.topic for row in rows}
+
+
+def save_generation(feature, topic, items):
+    """
+    Stores (or replaces) the pre-generated items for a topic, under the
+    current provider and model. Does not commit - the caller owns the transaction.
+    """
+    row = {
+        'feature': feature,
+        'topic': normalize_topic(topic),
+        'model': model_key(),
+        'content': json.dumps(items),
+        'generated_at': datetime.utcnow(),
+    }
+    upsert(
+        PrewarmedGeneration, [row], ['feature', 'topic', 'model'],
+        lambda excluded: {'content': excluded['content'], 'generated_at': excluded['generated_at']},
+    )
+
+
+def purge_expired():
+    """
+    Deletes entries older than PREWARM_FRESHNESS. Does not commit.
+
+    Returns:
+        int: Number of rows deleted
+    """
+    cutoff = datetime.utcnow() - timedelta(seconds=current_app.config['PREWARM_FRESHNESS'])
+    return db.session.query(PrewarmedGeneration).filter(
+        PrewarmedGeneration.generated_at < cutoff
+    ).delete(synchronize_session=False)
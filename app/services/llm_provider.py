@@ -0,0 +1,221 @@
+import hashlib
+import json
+import math
+import random
+import threading
+import time
+from collections import namedtuple
+
+import openai
+from app.services.openai_client import client_manager
+
+
+# Token counts reported for one upstream call
+Usage = namedtuple('Usage', ['prompt_tokens', 'completion_tokens'])
+
+
+class ProviderError(Exception):
+    """An upstream failure raised by a provider. openai_services wraps it in OpenAIError."""
+
+    def __init__(self, message, retryable=True):
+        super().__init__(message)
+        self.retryable = retryable
+
+
+class ProviderTimeout(ProviderError):
+    """The call didn't finish within its timeout."""
+
+
+# Worth another attempt: timeouts, connection failures, 429s and 5xx responses
+_RETRYABLE_OPENAI_ERRORS = (openai.APIConnectionError, openai.RateLimitError, openai.InternalServerError)
+
+
+def is_retryable(error):
+    """True if a provider call failing with `error` may succeed if tried again."""
+    if isinstance(error, ProviderError):
+        return error.retryable
+    return isinstance(error, _RETRYABLE_OPENAI_ERRORS)
+
+
+def _usage_from(response_usage):
+    if response_usage is None:
+        return Usage(0, 0)
+    return Usage(response_usage.prompt_tokens, response_usage.completion_tokens)
+
+
+class OpenAIProvider:
+    """
+    Chat completions through the OpenAI SDK, on this worker's pooled client.
+    complete_* return (content, Usage); stream_chat passes the Usage to on_usage.
+    `timeout` (seconds) overrides the client's default for one call.
+    """
+
+    name = 'openai'
+
+    def __init__(self, config):
+        self.model = config['OPENAI_MODEL']
+
+    def get_client(self):
+        return client_manager.get_client()
+
+    @staticmethod
+    def _options(timeout, max_tokens=None):
+        options = {}
+        if timeout is not None:
+            options['timeout'] = timeout
+        if max_tokens:
+            options['max_tokens'] = max_tokens
+        return options
+
+    def complete_json(self, system_prompt, user_prompt, timeout=None):
+        response = self.get_client().chat.completions.create(
+            model=self.model,
+            response_format={"type": "json_object"},
+            messages=[
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": user_prompt}
+            ],
+            **self._options(timeout)
+        )
+        return response.choices[0].message.content, _usage_from(response.usage)
+
+    def complete_chat(self, messages, max_tokens=None, timeout=None):
+        response = self.get_client().chat.completions.create(
+            model=self.model,
+            messages=messages,
+            **self._options(timeout, max_tokens)
+        )
+        return response.choices[0].message.content, _usage_from(response.usage)
+
+    def stream_chat(self, messages, on_usage=None, timeout=None):
+        with self.get_client().chat.completions.create(
+            model=self.model,
+            messages=messages,
+            stream=True,
+            stream_options={"include_usage": True},
+            **self._options(timeout)
+        ) as stream:
+            for chunk in stream:
+                # The usage-only chunk comes last, with no choices
+                if chunk.usage is not None and on_usage is not None:
+                    on_usage(_usage_from(chunk.usage))
+                if not chunk.choices:
+                    continue
+                delta = chunk.choices[0].delta.content
+                if delta:
+                    yield delta
+
+
+class StubProvider:
+    """
+    Local stand-in for load tests and offline development. No network calls.
+
+    Replies are deterministic - the same prompt always gets the same schema-valid
+    facts/quotes JSON or chat reply. Latency (LLM_STUB_LATENCY_MS, with
+    LLM_STUB_LATENCY_DISTRIBUTION "fixed", "normal" or "lognormal" and spread
+    LLM_STUB_LATENCY_JITTER) and failures (LLM_STUB_ERROR_RATE) are drawn from a
+    seeded generator, so runs are reproducible.
+    """
+
+    name = 'stub'
+    DISTRIBUTIONS = ('fixed', 'normal', 'lognormal')
+
+    def __init__(self, config):
+        self.latency_ms = config['LLM_STUB_LATENCY_MS']
+        self.distribution = config['LLM_STUB_LATENCY_DISTRIBUTION']
+        self.jitter = config['LLM_STUB_LATENCY_JITTER']
+        self.error_rate = config['LLM_STUB_ERROR_RATE']
+        self.chunk_delay_ms = config['LLM_STUB_STREAM_CHUNK_DELAY_MS']
+        if self.distribution not in self.DISTRIBUTIONS:
+            raise ValueError(f'LLM_STUB_LATENCY_DISTRIBUTION must be one of {", ".join(self.DISTRIBUTIONS)}')
+        self._random = random.Random(config['LLM_STUB_SEED'])
+        self._lock = threading.Lock()
+
+    def _sample_latency(self):
+        """Returns one simulated response time in seconds."""
+        with self._lock:
+            if self.distribution == 'normal':
+                latency = self._random.gauss(self.latency_ms, self.jitter)
+            elif self.distribution == 'lognormal':
+                # LLM_STUB_LATENCY_MS is the median, jitter is sigma - a long right tail like real APIs
+                latency = self._random.lognormvariate(0, self.jitter) * self.latency_ms
+            else:
+                latency = self.latency_ms
+            failed = self._random.random() < self.error_rate
+        return max(latency, 0) / 1000, failed
+
+    def _simulate_call(self, timeout=None):
+        latency, failed = self._sample_latency()
+        if timeout is not None and latency > timeout:
+            time.sleep(timeout)
+            raise ProviderTimeout('Simulated upstream timeout (stub provider)')
+        time.sleep(latency)
+        if failed:
+            raise ProviderError('Simulated upstream error (stub provider)')
+
+    @staticmethod
+    def _usage(prompt_texts, reply):
+        # Roughly 4 characters per token, like the real tokenizer on English text
+        return Usage(math.ceil(sum(len(text) for text in prompt_texts) / 4), math.ceil(len(reply) / 4))
+
+    @staticmethod
+    def _seed_for(*parts):
+        return hashlib.sha256(json.dumps(parts).encode()).hexdigest()[:8]
+
+    def complete_json(self, system_prompt, user_prompt, timeout=None):
+        self._simulate_call(timeout)
+        tag = self._seed_for(system_prompt, user_prompt)
+        if '"quotes"' in system_prompt:
+            content = json.dumps({'quotes': [
+                {'text': f'Stub quote {i} ({tag}) about: {user_prompt}', 'author': 'Unknown'} for i in range(1, 6)
+            ]})
+        else:
+            content = json.dumps({'facts': [f'Stub fact {i} ({tag}) about: {user_prompt}' for i in range(1, 6)]})
+        return content, self._usage([system_prompt, user_prompt], content)
+
+    def _reply(self, messages):
+        tag = self._seed_for([message['content'] for message in messages])
+        return f"Stub reply ({tag}) to: {messages[-1]['content']}"
+
+    def complete_chat(self, messages, max_tokens=None, timeout=None):
+        self._simulate_call(timeout)
+        reply = self._reply(messages)
+        return reply, self._usage([message['content'] for message in messages], reply)
+
+    def stream_chat(self, messages, on_usage=None, timeout=None):
+        # The sampled latency is time to first token; each further chunk adds the chunk delay
+        self._simulate_call(timeout)
+        reply = self._reply(messages)
+        words = reply.split(' ')
+        for i, word in enumerate(words):
+            if i:
+                time.sleep(self.chunk_delay_ms / 1000)
+            yield word if i == len(words) - 1 else word + ' '
+        if on_usage is not None:
+            on_usage(self._usage([message['content'] for message in messages], reply))
+
+
+PROVIDERS = {
+    OpenAIProvider.name: OpenAIProvider,
+    StubProvider.name: StubProvider,
+}
+
+
+class ProviderManager:
+    """Holds the LLM backend selected by LLM_PROVIDER ("openai" or "stub")."""
+
+    def __init__(self):
+        self.provider = None
+
+    def init_app(self, app):
+        name = app.config['LLM_PROVIDER']
+        if name not in PROVIDERS:
+            raise ValueError(f'Unknown LLM_PROVIDER {name!r}, expected one of {", ".join(PROVIDERS)}')
+        self.provider = PROVIDERS[name](app.config)
+        app.extensions['llm_provider'] = self
+
+    def get_provider(self):
+        return self.provider
+
+
+provider_manager = ProviderManager()
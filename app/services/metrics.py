@@ -0,0 +1,164 @@
+import os
+import time
+from contextlib import contextmanager
+from flask import g, request
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+# prometheus_client writes per-process files here as soon as a metric is created
+if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+    os.makedirs(os.environ['PROMETHEUS_MULTIPROC_DIR'], exist_ok=True)
+
+# Seconds. Upstream calls take up to OPENAI_TIMEOUT, so the top buckets go past the usual 10s
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+REQUEST_LATENCY = Histogram(
+    'http_request_duration_seconds',
+    'Time until the response is ready (for SSE, until the stream starts)',
+    ['blueprint', 'method', 'status'],
+    buckets=LATENCY_BUCKETS,
+)
+STAGE_LATENCY = Histogram(
+    'request_stage_duration_seconds',
+    'Time spent in one stage of a request: jwt_verify, quota_check, password_hash, upstream or db_commit',
+    ['stage'],
+    buckets=LATENCY_BUCKETS,
+)
+UPSTREAM_ERRORS = Counter(
+    'upstream_errors_total',
+    'Failed LLM provider calls',
+    ['operation'],
+)
+UPSTREAM_RETRIES = Counter(
+    'upstream_retries_total',
+    'Extra upstream attempts made after a retryable error',
+    ['feature'],
+)
+UPSTREAM_HEDGES = Counter(
+    'upstream_hedged_requests_total',
+    'Second upstream requests launched because the first was slower than the hedge delay',
+    ['feature'],
+)
+UPSTREAM_HEDGE_WINS = Counter(
+    'upstream_hedge_wins_total',
+    'Hedged requests that answered before the original',
+    ['feature'],
+)
+UPSTREAM_WASTED_TOKENS = Counter(
+    'upstream_wasted_tokens_total',
+    'Tokens spent on hedged or original requests whose answer was discarded',
+    ['feature'],
+)
+CIRCUIT_REJECTIONS = Counter(
+    'upstream_circuit_rejections_total',
+    'LLM calls failed fast because the circuit breaker was open',
+)
+CIRCUIT_TRANSITIONS = Counter(
+    'upstream_circuit_transitions_total',
+    'Circuit breaker state changes, by the state entered',
+    ['state'],
+)
+OPENAI_HTTP_EVENTS = Counter(
+    'openai_http_events_total',
+    'OpenAI HTTP client activity: requests sent, new TCP connections and TLS handshakes '
+    '(connection reuse = 1 - connections_opened / requests)',
+    ['event'],
+)
+RESPONSE_CACHE_LOOKUPS = Counter(
+    'response_cache_lookups_total',
+    'Response cache lookups by result: local_hit, shared_hit or miss',
+    ['result'],
+)
+RESPONSE_CACHE_EVICTIONS = Counter(
+    'response_cache_shared_evictions_total',
+    'Entries removed from the shared (disk) cache tier by the sweep, by reason: expired or size',
+    ['reason'],
+)
+SINGLE_FLIGHT_CALLS = Counter(
+    'single_flight_calls_total',
+    'Identical upstream calls by role: leader (made the call), follower (waited in this worker) '
+    'or shared_follower (found another worker\'s result after waiting on the host lock)',
+    ['role'],
+)
+SINGLE_FLIGHT_FOLLOWER_TIMEOUTS = Counter(
+    'single_flight_follower_timeouts_total',
+    'Followers that gave up waiting for the leader after the upstream deadline',
+)
+RATE_LIMIT_REJECTIONS = Counter(
+    'rate_limit_rejections_total',
+    'Requests refused because the daily quota was used up',
+)
+
+
+@contextmanager
+def time_stage(stage):
+    """Observes how long the block takes in request_stage_duration_seconds (errors included)."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        STAGE_LATENCY.labels(stage).observe(time.perf_counter() - started)
+
+
+@contextmanager
+def track_upstream(operation):
+    """time_stage('upstream') that also counts failures per operation (json, chat, stream)."""
+    with time_stage('upstream'):
+        try:
+            yield
+        except Exception:
+            UPSTREAM_ERRORS.labels(operation).inc()
+            raise
+
+
+@event.listens_for(Session, 'before_commit')
+def _commit_started(session):
+    session.info['commit_started'] = time.perf_counter()
+
+
+@event.listens_for(Session, 'after_commit')
+def _commit_finished(session):
+    started = session.info.pop('commit_started', None)
+    if started is not None:
+        STAGE_LATENCY.labels('db_commit').observe(time.perf_counter() - started)
+
+
+def _registry():
+    # Under gunicorn with PROMETHEUS_MULTIPROC_DIR set, every worker writes its
+    # samples to files there, and /metrics merges all of them - not just this worker's
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return registry
+    return REGISTRY
+
+
+def render_metrics():
+    """Returns (body, content type) in the Prometheus text format."""
+    return generate_latest(_registry()), CONTENT_TYPE_LATEST
+
+
+def register_metrics(app):
+    """Times every request by blueprint."""
+
+    @app.before_request
+    def _start_timer():
+        g.request_started = time.perf_counter()
+
+    @app.after_request
+    def _observe_request(response):
+        started = g.pop('request_started', None)
+        if started is not None:
+            REQUEST_LATENCY.labels(
+                request.blueprint or 'none', request.method, str(response.status_code)
+            ).observe(time.perf_counter() - started)
+        return response
@@ -0,0 +1,96 @@
+import threading
+
+import httpx
+from openai import OpenAI
+from app.services.metrics import OPENAI_HTTP_EVENTS
+from app.services.per_process import PerProcess
+
+
+class OpenAIClientManager:
+    """
+    Holds one pooled OpenAI client per worker process.
+
+    The client is created lazily on first use and recreated whenever the
+    process id changes, so a client built in the gunicorn master (preload_app)
+    is never shared with forked workers. Connection events are traced so
+    stats() and /metrics (openai_http_events_total) show how often requests
+    reuse a keep-alive connection.
+    """
+
+    def __init__(self):
+        self.settings = {}
+        self._client = PerProcess(self._build_client)
+        self._stats_lock = threading.Lock()
+        self._stats = self._empty_stats()
+
+    def init_app(self, app):
+        self.settings = {
+            'api_key': app.config['OPENAI_API_KEY'],
+            'max_connections': app.config['OPENAI_MAX_CONNECTIONS'],
+            'max_keepalive_connections': app.config['OPENAI_MAX_KEEPALIVE_CONNECTIONS'],
+            'keepalive_expiry': app.config['OPENAI_KEEPALIVE_EXPIRY'],
+            'timeout': app.config['OPENAI_TIMEOUT'],
+            'connect_timeout': app.config['OPENAI_CONNECT_TIMEOUT'],
+            'http2': app.config['OPENAI_HTTP2'],
+        }
+        self._client.clear()
+        app.extensions['openai_client'] = self
+
+    @staticmethod
+    def _empty_stats():
+        return {'requests': 0, 'connections_opened': 0, 'tls_handshakes': 0}
+
+    def _count(self, name):
+        with self._stats_lock:
+            self._stats[name] += 1
+        OPENAI_HTTP_EVENTS.labels(name).inc()
+
+    def _on_request(self, request):
+        self._count('requests')
+        request.extensions['trace'] = self._trace
+
+    def _trace(self, event_name, info):
+        if event_name == 'connection.connect_tcp.complete':
+            self._count('connections_opened')
+        elif event_name == 'connection.start_tls.complete':
+            self._count('tls_handshakes')
+
+    def _build_client(self):
+        with self._stats_lock:
+            self._stats = self._empty_stats()
+
+        settings = self.settings
+        http_client = httpx.Client(
+            limits=httpx.Limits(
+                max_connections=settings['max_connections'],
+                max_keepalive_connections=settings['max_keepalive_connections'],
+                keepalive_expiry=settings['keepalive_expiry'],
+            ),
+            timeout=httpx.Timeout(settings['timeout'], connect=settings['connect_timeout']),
+            http2=settings['http2'],
+            event_hooks={'request': [self._on_request]},
+        )
+        # No SDK retries - UpstreamPolicy owns retries, so they stay within the request's deadline
+        return OpenAI(api_key=settings['api_key'], http_client=http_client, max_retries=0)
+
+    def get_client(self):
+        """Returns this process's shared client, creating it on first use (or after a fork)."""
+        return self._client.get()
+
+    def close(self):
+        client = self._client.clear()
+        if client is not None:
+            client.close()
+
+    def stats(self):
+        """Returns connection reuse counters for this worker process."""
+        with self._stats_lock:
+            stats = dict(self._stats)
+
+        requests = stats['requests']
+        reused = max(requests - stats['connections_opened'], 0)
+        stats['reuse_ratio'] = reused / requests if requests else 0.0
+        return stats
+
+
+client_manager = OpenAIClientManager()
@@ -1,52 +1,103 @@
 import json
-from openai import OpenAI
 from flask import current_app
 
-from app.errors.exceptions import OpenAIError
+from app.errors.exceptions import OpenAIError, UpstreamUnavailableError
+from app.services.circuit_breaker import circuit_breaker
+from app.services.llm_provider import provider_manager
+from app.services.metrics import track_upstream
+from app.services.response_cache import response_cache, make_cache_key
+from app.services.single_flight import single_flight
+from app.services.upstream_policy import upstream_policy
+from app.services import token_usage
 
 
-def get_client():
-    """Create OpenAI client using API key from config."""
-    return OpenAI(api_key=current_app.config['OPENAI_API_KEY'])
+def get_provider():
+    """Return the LLM backend selected by LLM_PROVIDER (OpenAI, or the local stub)."""
+    return provider_manager.get_provider()
 
 
-def call_openai(system_prompt, user_prompt):
+def model_key():
     """
-    Makes a call to OpenAI's API with JSON mode enabled - works for facts and quotes.
+    "<provider>/<model>" of the current backend, e.g. "openai/gpt-4o-mini" or
+    "stub/gpt-4o-mini". Part of every stored generation's key, so stub replies
+    are never served as real ones.
+    """
+    return f"{get_provider().name}/{current_app.config['OPENAI_MODEL']}"
+
+
+def _request_json_completion(system_prompt, user_prompt, feature):
+    """Makes the actual JSON-mode upstream call and returns the raw JSON string."""
+    try:
+        provider = get_provider()
+        with circuit_breaker.guard(), track_upstream('json'):
+            content, usage = upstream_policy.call(
+                feature, lambda timeout: provider.complete_json(system_prompt, user_prompt, timeout=timeout)
+            )
+        token_usage.track(feature or 'other', usage)
+
+        # Make sure the response is valid JSON before anyone shares it
+        json.loads(content)
+        return content
+
+    except json.JSONDecodeError:
+        raise OpenAIError("OpenAI returned invalid JSON")
+    except UpstreamUnavailableError:
+        raise
+    except Exception as e:
+        raise OpenAIError(str(e))
+
+
+def call_openai(system_prompt, user_prompt, feature=None):
+    """
+    Makes a call to the LLM provider (OpenAI by default) with JSON mode enabled - works for facts and quotes.
+    Responses are cached per feature (see RESPONSE_CACHE_TTL), so repeated
+    prompts skip the upstream call, and identical prompts already in flight
+    wait for that call instead of making their own (see SingleFlight).
+    The upstream call itself runs under the feature's deadline, retry and
+    hedging policy (see UpstreamPolicy).
 
     Args:
         system_prompt: Instructions for the AI (e.g., "Return 5 facts as JSON")
         user_prompt: The user's actual input (e.g., "black holes, beginner friendly")
+        feature: Optional feature name ("facts" or "quotes") used to pick the cache TTL
 
     Returns:
         dict: Parsed JSON response from OpenAI
 
     Raises:
+        UpstreamUnavailableError: If the circuit breaker is open (see CircuitBreaker)
         Exception: If API call fails or response isn't valid JSON
     """
-    client = get_client()
-
+    # Keyed by backend too, so stub replies never get served as real ones from a shared cache
+    model = model_key()
+    ttl = response_cache.ttl_for(feature)
+    cache_key = make_cache_key(system_prompt, model, user_prompt)
+
+    if ttl:
+        cached = response_cache.get(cache_key)
+        if cached is not None:
+            return json.loads(cached)
+
+    def fetch():
+        content = _request_json_completion(system_prompt, user_prompt, feature)
+        # Cache before waiters are released, so workers queued on the host lock find it
+        if ttl:
+            response_cache.set(cache_key, content, ttl)
+        return content
+
+    def recheck():
+        return response_cache.get(cache_key) if ttl else None
+
+    # Share the raw JSON so every caller gets its own freshly parsed copy. Waiting on
+    # someone else's call gets the same deadline as making it ourselves.
     try:
-        response = client.chat.completions.create(
-            model="gpt-4o-mini",
-            response_format={"type": "json_object"},
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": user_prompt}
-            ]
-        )
-
-        # Parse the JSON string from OpenAI's response
-        result = json.loads(response.choices[0].message.content)
-        return result
-
-    except json.JSONDecodeError:
-        raise OpenAIError("OpenAI returned invalid JSON")
-    except Exception as e:
-        raise OpenAIError(str(e))
+        content = single_flight.do(cache_key, fetch, recheck, timeout=upstream_policy.deadline_for(feature))
+    except TimeoutError:
+        raise OpenAIError('Upstream deadline exceeded')
+    return json.loads(content)
 
 
-def call_openai_conversation(messages):
+def call_openai_conversation(messages, max_tokens=None, feature='conversation'):
     """
     Makes a call to OpenAI with full conversation history.
     Used for Q&A feature where context from previous messages matters.
@@ -57,19 +108,44 @@ def call_openai_conversation(messages):
                          {"role": "user", "content": "..."},
                          {"role": "assistant", "content": "..."},
                          {"role": "user", "content": "..."}]
+        max_tokens: Optional cap on the reply length
+        feature: Name the call's token usage is recorded under
 
     Returns:
         str: The assistant's reply as plain text
     """
-    client = get_client()
-
     try:
-        response = client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=messages
-        )
+        provider = get_provider()
+        with circuit_breaker.guard(), track_upstream('chat'):
+            reply, usage = upstream_policy.call(
+                feature, lambda timeout: provider.complete_chat(messages, max_tokens=max_tokens, timeout=timeout)
+            )
+        token_usage.track(feature, usage)
+        return reply
+    except UpstreamUnavailableError:
+        raise
+    except Exception as e:
+        raise OpenAIError(str(e))
 
-        return response.choices[0].message.content
+def stream_openai_conversation(messages):
+    """
+    Streams the assistant's reply for a conversation as it is generated.
+    Same input as call_openai_conversation, but tokens are yielded as they
+    arrive instead of waiting for the full completion.
+
+    Args:
+        messages: List of message dicts with 'role' and 'content'
 
+    Yields:
+        str: The next chunk of the assistant's reply
+    """
+    try:
+        provider = get_provider()
+        with circuit_breaker.guard(count_slow=False), track_upstream('stream'):
+            yield from upstream_policy.stream('conversation', lambda timeout: provider.stream_chat(
+                messages, on_usage=lambda usage: token_usage.track('conversation', usage), timeout=timeout
+            ))
+    except UpstreamUnavailableError:
+        raise
     except Exception as e:
-        raise OpenAIError(str(e))
\ No newline at end of file
+        raise OpenAIError(str(e))
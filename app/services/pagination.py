@@ -0,0 +1,67 @@
+import base64
+import binascii
+import json
+from datetime import datetime
+from sqlalchemy import tuple_
+from app.errors.exceptions import BadRequestError
+
+
+def encode_cursor(item):
+    """Builds an opaque cursor pointing just past `item` in (created_at, id) order."""
+    raw = json.dumps([item.created_at.isoformat(), item.id])
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor):
+    """
+    Reverses encode_cursor().
+
+    Returns:
+        tuple: (created_at: datetime, id: int)
+
+    Raises:
+        BadRequestError: If the cursor wasn't produced by encode_cursor()
+    """
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        created_at, item_id = json.loads(base64.urlsafe_b64decode(padded))
+        return datetime.fromisoformat(created_at), int(item_id)
+    except (binascii.Error, ValueError, TypeError):
+        raise BadRequestError('Invalid cursor')
+
+
+def newest_first_page_query(query, model, limit, cursor=None):
+    """
+    Applies keyset pagination over (created_at, id), newest first.
+    Seeks straight to the cursor position through the index instead of using
+    OFFSET, so deep pages cost the same as the first one.
+
+    Fetches one extra row so the caller can tell whether another page exists.
+    """
+    if cursor:
+        created_at, item_id = decode_cursor(cursor)
+        query = query.filter(tuple_(model.created_at, model.id) < tuple_(created_at, item_id))
+
+    return query.order_by(model.created_at.desc(), model.id.desc()).limit(limit + 1)
+
+
+def paginate_newest_first(query, model, limit, cursor=None):
+    """
+    Returns one page of `query`, newest first.
+
+    Args:
+        query: Base query, already filtered (e.g., by user)
+        model: The model being paged; needs created_at and id columns
+        limit: Page size
+        cursor: next_cursor from the previous page, or None for the first page
+
+    Returns:
+        tuple: (items: list, next_cursor: str or None)
+    """
+    items = newest_first_page_query(query, model, limit, cursor).all()
+
+    if len(items) > limit:
+        items = items[:limit]
+        return items, encode_cursor(items[-1])
+
+    return items, None
@@ -0,0 +1,100 @@
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from werkzeug.security import DEFAULT_PBKDF2_ITERATIONS, check_password_hash, generate_password_hash
+from app.errors.exceptions import ServiceUnavailableError
+from app.services.metrics import time_stage
+from app.services.per_process import PerProcess
+
+
+def _expand_method(method):
+    """
+    Spells out a werkzeug method spec with werkzeug's defaults filled in, the
+    way generate_password_hash() writes it into the hash
+    (e.g. "pbkdf2:sha256" -> "pbkdf2:sha256:1000000", "scrypt" -> "scrypt:32768:8:1").
+
+    Raises:
+        ValueError: If the spec isn't a valid pbkdf2 or scrypt method
+    """
+    name, *args = method.split(':')
+    if name == 'scrypt':
+        n, r, p = map(int, args) if args else (2 ** 15, 8, 1)
+        return f'scrypt:{n}:{r}:{p}'
+    if name == 'pbkdf2' and len(args) <= 2:
+        hash_name = args[0] if args else 'sha256'
+        iterations = int(args[1]) if len(args) == 2 else DEFAULT_PBKDF2_ITERATIONS
+        return f'pbkdf2:{hash_name}:{iterations}'
+    raise ValueError(f'Invalid password hash method {method!r}')
+
+
+class PasswordHasher:
+    """
+    Runs password hashing (deliberately CPU-heavy) on a small process pool, so a
+    burst of logins can't pin every request worker - or, under gevent, block the
+    whole event loop - while AI requests queue behind them.
+
+    At most PASSWORD_HASH_MAX_CONCURRENT hashes per worker process are queued or
+    running; callers wait up to PASSWORD_HASH_QUEUE_TIMEOUT seconds for a slot
+    and then get a 503. With PASSWORD_HASH_WORKERS=0 hashing runs inline.
+
+    PASSWORD_HASH_METHOD is a werkzeug method spec (e.g. "pbkdf2:sha256:1000000"
+    or "scrypt"; left-out parameters take werkzeug's defaults). Hashes made with
+    any other method still verify, and needs_rehash() flags them for upgrade on login.
+    """
+
+    def __init__(self):
+        self.method = 'pbkdf2:sha256:1000000'
+        self.workers = 0
+        self.queue_timeout = 10
+        self._slots = None
+        self._pool = PerProcess(self._build_pool)
+
+    def init_app(self, app):
+        self.method = _expand_method(app.config['PASSWORD_HASH_METHOD'])
+        self.workers = app.config['PASSWORD_HASH_WORKERS']
+        self.queue_timeout = app.config['PASSWORD_HASH_QUEUE_TIMEOUT']
+        self._slots = threading.BoundedSemaphore(app.config['PASSWORD_HASH_MAX_CONCURRENT'])
+        self._pool.clear()
+        app.extensions['password_hasher'] = self
+
+    def _build_pool(self):
+        # spawn, not fork: forking a process that has threads running can deadlock the child
+        return ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context('spawn'),
+        )
+
+    def _run(self, fn, *args):
+        if not self._slots.acquire(timeout=self.queue_timeout):
+            raise ServiceUnavailableError('Too many sign-ins right now, please try again shortly')
+        try:
+            with time_stage('password_hash'):
+                if not self.workers:
+                    return fn(*args)
+                return self._pool.get().submit(fn, *args).result()
+        finally:
+            self._slots.release()
+
+    def hash(self, password):
+        """Hashes a password with PASSWORD_HASH_METHOD."""
+        return self._run(generate_password_hash, password, self.method)
+
+    def verify(self, password_hash, password):
+        """Checks a password against a stored hash made with any supported method."""
+        return self._run(check_password_hash, password_hash, password)
+
+    def needs_rehash(self, password_hash):
+        """True if the stored hash was made with different parameters than PASSWORD_HASH_METHOD."""
+        try:
+            return _expand_method(password_hash.split('$', 1)[0]) != self.method
+        except ValueError:
+            # A method werkzeug no longer writes (e.g. a legacy plain "sha1$...")
+            return True
+
+    def shutdown(self):
+        pool = self._pool.clear()
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+
+password_hasher = PasswordHasher()
@@ -0,0 +1,43 @@
+import os
+import threading
+
+
+class PerProcess:
+    """
+    A lazily built value, one per process.
+
+    factory() runs on first get() and again whenever the process id changes,
+    so a client, pool or thread built in the gunicorn master (preload_app) is
+    never shared with forked workers - sockets, pools and threads don't carry
+    over into a forked child.
+    """
+
+    def __init__(self, factory):
+        self.factory = factory
+        self._state = None  # (pid, value), swapped as one so readers never see a mixed pair
+        self._lock = threading.Lock()
+
+    def get(self):
+        """Returns this process's value, building it on first use (or after a fork)."""
+        pid = os.getpid()
+        state = self._state
+        if state is None or state[0] != pid:
+            with self._lock:
+                state = self._state
+                if state is None or state[0] != pid:
+                    # Don't clean up a value inherited from the parent - it still belongs to the parent
+                    state = self._state = (pid, self.factory())
+        return state[1]
+
+    def clear(self):
+        """
+        Forgets the value, so the next get() builds a new one.
+
+        Returns:
+            The value if this process built it (the caller may close it), else None
+        """
+        with self._lock:
+            state, self._state = self._state, None
+        if state is None or state[0] != os.getpid():
+            return None
+        return state[1]
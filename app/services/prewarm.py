@@ -0,0 +1,99 @@
+from datetime import datetime, timedelta
+from flask import current_app
+from app.errors.exceptions import AppError, UpstreamUnavailableError
+from app.services.generation import FEATURES, generate_upstream
+from app.services.generation_store import fresh_topics, purge_expired, save_generation
+from app.services.token_usage import take_pending
+from app.services.trending import get_top_topics
+from app.services.unit_of_work import unit_of_work
+
+
+def in_prewarm_window(now=None):
+    """True if `now` (UTC, default the current time) is within PREWARM_HOURS, e.g. "2-6" or "22-4"."""
+    start, end = (int(hour) for hour in current_app.config['PREWARM_HOURS'].split('-'))
+    hour = (now or datetime.utcnow()).hour
+    if start <= end:
+        return start <= hour < end
+    return hour >= start or hour < end
+
+
+def _candidates(top_n, refresh_before):
+    """
+    Trending topics that need generating, most searched first across both
+    features, skipping ones generated after `refresh_before`.
+
+    Returns:
+        tuple: (candidates: list of (feature, topic), skipped: int - still fresh)
+    """
+    ranked = []
+    skipped = 0
+    for feature in FEATURES:
+        top = get_top_topics(feature, top_n)
+        fresh = fresh_topics(feature, [row.topic for row in top], refresh_before)
+        skipped += len(fresh)
+        ranked.extend((row.count, feature, row.topic) for row in top if row.topic not in fresh)
+
+    ranked.sort(key=lambda candidate: candidate[0], reverse=True)
+    return [(feature, topic) for _, feature, topic in ranked], skipped
+
+
+def prewarm(top_n=None, max_calls=None, max_tokens=None):
+    """
+    Generates facts/quotes for the top trending topics ahead of time, so
+    comment-less requests for them are answered from the generation store.
+
+    Entries older than half of PREWARM_FRESHNESS are regenerated, so a job
+    that runs at least that often keeps popular topics continuously fresh.
+    The run stops once it has made max_calls upstream calls or used
+    max_tokens tokens, or if the circuit breaker opens.
+
+    Args:
+        top_n: Topics per feature (default PREWARM_TOP_N)
+        max_calls: Upstream call budget (default PREWARM_MAX_CALLS)
+        max_tokens: Token budget (default PREWARM_MAX_TOKENS)
+
+    Returns:
+        dict: What the run did - generated, skipped, failed, calls, tokens,
+              purged and stopped (why it ended early, or None)
+    """
+    config = current_app.config
+    top_n = top_n or config['PREWARM_TOP_N']
+    max_calls = max_calls if max_calls is not None else config['PREWARM_MAX_CALLS']
+    max_tokens = max_tokens if max_tokens is not None else config['PREWARM_MAX_TOKENS']
+
+    refresh_before = datetime.utcnow() - timedelta(seconds=config['PREWARM_FRESHNESS'] / 2)
+    candidates, skipped = _candidates(top_n, refresh_before)
+    stats = {'generated': 0, 'skipped': skipped, 'failed': 0, 'calls': 0, 'tokens': 0, 'purged': 0, 'stopped': None}
+
+    # Commit after every step, so no transaction stays open across upstream calls
+    with unit_of_work():
+        stats['purged'] = purge_expired()
+
+    for feature, topic in candidates:
+        if stats['calls'] >= max_calls:
+            stats['stopped'] = 'call budget reached'
+            break
+        if stats['tokens'] >= max_tokens:
+            stats['stopped'] = 'token budget reached'
+            break
+
+        stats['calls'] += 1
+        try:
+            items = generate_upstream(feature, topic)
+        except UpstreamUnavailableError:
+            stats['stopped'] = 'circuit breaker open'
+            break
+        except AppError as e:
+            current_app.logger.warning('Pre-warming %s for %r failed: %s', feature, topic, e.message)
+            stats['failed'] += 1
+            continue
+        finally:
+            # Not billed to any user, only counted against the run's budget
+            for requests, prompt_tokens, completion_tokens in take_pending().values():
+                stats['tokens'] += prompt_tokens + completion_tokens
+
+        with unit_of_work():
+            save_generation(feature, topic, items)
+        stats['generated'] += 1
+
+    return stats
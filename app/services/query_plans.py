@@ -0,0 +1,198 @@
+import uuid
+from datetime import date, datetime, timedelta
+from sqlalchemy import func, insert
+from sqlalchemy.engine import make_url
+from app import db
+from app.models.user import User
+from app.models.saved_item import SavedItem
+from app.models.conversation import Conversation
+from app.models.conversation_message import ConversationMessage
+from app.models.prewarmed_generation import PrewarmedGeneration
+from app.models.token_usage import TokenUsage
+from app.models.topic_search_count import TopicSearchCount, ALL_FEATURES, ALL_TIME
+from app.schemas.request_schemas import DEFAULT_PAGE_SIZE
+from app.schemas.row_serializers import (
+    CONVERSATION_DETAIL_COLUMNS,
+    CONVERSATION_LIST_COLUMNS,
+    MESSAGE_COLUMNS,
+    SAVED_ITEM_COLUMNS,
+)
+from app.services.conversation_history import history_query
+from app.services.etags import conversation_version_query, conversations_version_query, favourites_version_query
+from app.services.generation_store import generation_query
+from app.services.openai_services import model_key
+from app.services.pagination import encode_cursor, newest_first_page_query
+from app.services.token_usage import tokens_used_today_query
+from app.services.trending import top_topics_query
+
+SEED_USERS = 50
+SEED_ROWS = 2000
+
+
+def route_queries(user_id, conversation_id, cursor):
+    """
+    The hot queries behind each route, built with the same column tuples and
+    query builders the routes and services use. Keep this in sync when a
+    route's query changes.
+    """
+    favourites = db.session.query(*SAVED_ITEM_COLUMNS).filter(SavedItem.user_id == user_id)
+    conversations = db.session.query(*CONVERSATION_LIST_COLUMNS).filter(Conversation.user_id == user_id)
+
+    return {
+        'favourites.get_favourites': newest_first_page_query(
+            favourites, SavedItem, DEFAULT_PAGE_SIZE
+        ),
+        'favourites.get_favourites?cursor': newest_first_page_query(
+            favourites, SavedItem, DEFAULT_PAGE_SIZE, cursor
+        ),
+        'favourites.get_favourites?category': newest_first_page_query(
+            favourites.filter(SavedItem.category == 'fact'), SavedItem, DEFAULT_PAGE_SIZE, cursor
+        ),
+        'favourites.get_favourites (ETag)': favourites_version_query(user_id),
+        'favourites.get_favourites?category (ETag)': favourites_version_query(user_id, 'fact'),
+        'favourites.add_favourite (duplicate check)': SavedItem.query.filter_by(
+            user_id=user_id, content='seed fact 0'
+        ).limit(1),
+        'conversation.list_conversations': newest_first_page_query(
+            conversations, Conversation, DEFAULT_PAGE_SIZE, cursor
+        ),
+        'conversation.list_conversations (ETag)': conversations_version_query(user_id),
+        'conversation.get_conversation': db.session.query(*CONVERSATION_DETAIL_COLUMNS).filter(
+            Conversation.id == conversation_id
+        ),
+        'conversation.get_conversation (messages)': db.session.query(*MESSAGE_COLUMNS).filter(
+            ConversationMessage.conversation_id == conversation_id
+        ).order_by(ConversationMessage.created_at, ConversationMessage.id),
+        'conversation.get_conversation (ETag)': conversation_version_query(conversation_id),
+        'conversation.send_message (message limit)': ConversationMessage.query.filter_by(
+            conversation_id=conversation_id, role='user'
+        ).with_entities(func.count(ConversationMessage.id)),
+        'conversation.send_message (history)': history_query(conversation_id, 0),
+        'facts.get_facts (prewarmed)': generation_query('facts', 'topic 0', datetime.utcnow() - timedelta(days=1)),
+        'facts.get_facts (token budget)': tokens_used_today_query(user_id),
+        'trending.get_trending': top_topics_query(),
+        'trending.get_trending?feature': top_topics_query('facts'),
+    }
+
+
+def _seed():
+    """
+    Adds enough rows for an index to be the planner's own choice (on tiny
+    tables a full scan is legitimately cheapest). Rolled back by the caller.
+    """
+    suffix = uuid.uuid4().hex[:8]
+    now = datetime.utcnow()
+
+    users = [
+        User(username=f'plan-check-{suffix}-{i}', email=f'plan-check-{suffix}-{i}@example.com', password_hash='x')
+        for i in range(SEED_USERS)
+    ]
+    db.session.add_all(users)
+    db.session.flush()
+
+    db.session.execute(insert(SavedItem), [
+        {
+            'user_id': users[i % SEED_USERS].id, 'category': 'fact' if i % 2 else 'quote',
+            'content': f'seed fact {i}', 'topic': f'topic {i % 20}', 'created_at': now - timedelta(minutes=i),
+        }
+        for i in range(SEED_ROWS)
+    ])
+
+    conversations = [
+        Conversation(user_id=users[i % SEED_USERS].id, title=f'seed {i}', created_at=now - timedelta(minutes=i))
+        for i in range(SEED_ROWS)
+    ]
+    db.session.add_all(conversations)
+    db.session.flush()
+
+    db.session.execute(insert(ConversationMessage), [
+        {
+            'conversation_id': conversation.id, 'role': 'user' if turn % 2 == 0 else 'assistant',
+            'content': f'seed message {turn}', 'created_at': now - timedelta(minutes=i, seconds=-turn),
+        }
+        for i, conversation in enumerate(conversations)
+        for turn in range(4)
+    ])
+
+    db.session.execute(insert(TopicSearchCount), [
+        {'feature': feature, 'topic': f'plan-check-{suffix}-{i}', 'bucket': ALL_TIME, 'count': i}
+        for i in range(SEED_ROWS)
+        for feature in ('facts', 'quotes', ALL_FEATURES)
+    ])
+
+    db.session.execute(insert(PrewarmedGeneration), [
+        {
+            'feature': feature, 'topic': f'topic {i}', 'model': model_key(),
+            'content': f'seed generation {i}', 'generated_at': now - timedelta(minutes=i),
+        }
+        for i in range(SEED_ROWS)
+        for feature in ('facts', 'quotes')
+    ])
+
+    db.session.execute(insert(TokenUsage), [
+        {
+            'user_id': user.id, 'day': date.today() - timedelta(days=day), 'feature': feature,
+            'requests': 1, 'prompt_tokens': 10, 'completion_tokens': 10,
+        }
+        for user in users
+        for day in range(SEED_ROWS // SEED_USERS)
+        for feature in ('facts', 'quotes')
+    ])
+
+    # A cursor into the middle of the first user's history, for deep-page plans
+    return users[0].id, conversations[0].id, encode_cursor(conversations[SEED_ROWS // 2])
+
+
+def is_scratch_database(url):
+    """
+    True if the database URL looks disposable: in-memory SQLite, or a database
+    whose name contains "scratch" or "test".
+    """
+    url = make_url(url)
+    name = (url.database or '').rsplit('/', 1)[-1].lower()
+    if url.get_backend_name() == 'sqlite' and name in ('', ':memory:'):
+        return True
+    return 'scratch' in name or 'test' in name
+
+
+def _explain(connection, query):
+    """Returns (plan lines, whether any table is read with a full scan)."""
+    compiled = query.statement.compile(dialect=connection.dialect)
+
+    if connection.dialect.name == 'postgresql':
+        rows = connection.exec_driver_sql(f'EXPLAIN {compiled}', compiled.params).all()
+        lines = [row[0] for row in rows]
+        return lines, any('Seq Scan' in line for line in lines)
+
+    # SQLite: "SCAN <table>" without an index is a full table scan
+    params = tuple(compiled.params[name] for name in compiled.positiontup)
+    rows = connection.exec_driver_sql(f'EXPLAIN QUERY PLAN {compiled}', params).all()
+    lines = [row[-1] for row in rows]
+    return lines, any(line.startswith('SCAN ') and 'USING' not in line for line in lines)
+
+
+def check_query_plans():
+    """
+    Seeds the database inside a transaction, EXPLAINs every hot route query and
+    rolls everything back. On Postgres it also runs ANALYZE, which updates the
+    planner statistics for good - only point it at a scratch database.
+
+    Returns:
+        list: (name, full_scan: bool, plan lines) for each query
+    """
+    results = []
+    try:
+        user_id, conversation_id, cursor = _seed()
+        connection = db.session.connection()
+
+        if connection.dialect.name == 'postgresql':
+            connection.exec_driver_sql('ANALYZE saved_items, conversations, conversation_messages, topic_search_counts, '
+                'prewarmed_generations, token_usage_daily')
+
+        for name, query in route_queries(user_id, conversation_id, cursor).items():
+            lines, full_scan = _explain(connection, query)
+            results.append((name, full_scan, lines))
+    finally:
+        db.session.rollback()
+
+    return results
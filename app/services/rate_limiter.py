@@ -1,40 +1,129 @@
-from datetime import date, datetime, timezone
+from datetime import date
+from flask import current_app
+from sqlalchemy import case, func, or_, update
 from app import db
 from app.models.user import User
+from app.services.metrics import RATE_LIMIT_REJECTIONS, time_stage
+from app.services.token_usage import tokens_used_today
 
 DAILY_LIMIT = 30
 
 
-def check_rate_limit(user: User):
+def _token_mode():
+    return current_app.config['QUOTA_MODE'] == 'tokens'
+
+
+def _check_token_budget(user_id):
+    """
+    QUOTA_MODE=tokens: lets the request through while the user has used less
+    than DAILY_TOKEN_LIMIT tokens today. A call's cost is only known afterwards,
+    so the call that crosses the limit still completes, and concurrent requests
+    near the limit can each overshoot it by about one call.
     """
-    Checks if the user has remaining requests for today.
-    If it's a new day, resets the counter first.
+    limit = current_app.config['DAILY_TOKEN_LIMIT']
+    # A plain read - the route's release_connection() ends the transaction
+    with time_stage('quota_check'):
+        used = tokens_used_today(user_id)
+
+    if used >= limit:
+        RATE_LIMIT_REJECTIONS.inc()
+        return False, 0
+
+    return True, limit - used
+
+
+def reserve_request(user_id, amount=1):
+    """
+    Reserves `amount` requests from the user's daily quota in a single
+    UPDATE ... RETURNING statement. The day-rollover reset, the limit check and
+    the increment all happen atomically in the database, so concurrent requests
+    from the same user can't lose increments or overshoot the limit.
+
+    Commits immediately: the reservation has to be visible to the user's other
+    requests before the upstream call starts. Call refund_request() if the
+    upstream call fails afterwards.
+
+    With QUOTA_MODE=tokens, checks today's token budget instead and reserves nothing.
 
     Args:
-        user: The User model instance
+        user_id: The user's id
+        amount: Number of requests to reserve (e.g., one per topic in a batch)
 
     Returns:
-        tuple: (allowed: bool, remaining: int)
+        tuple: (allowed: bool, remaining: int - requests, or tokens in token mode)
     """
+    if _token_mode():
+        return _check_token_budget(user_id)
+
     today = date.today()
+    new_day = or_(User.last_request_date.is_(None), User.last_request_date != today)
+    used = func.coalesce(User.daily_request_count, 0)
 
-    # New day — reset the counter
-    if user.last_request_date != today:
-        user.daily_request_count = 0
-        user.last_request_date = date.today()
+    stmt = (
+        update(User)
+        .where(User.id == user_id)
+        .where(or_(new_day, used + amount <= DAILY_LIMIT))
+        .values(
+            daily_request_count=case((new_day, amount), else_=used + amount),
+            last_request_date=today,
+        )
+        .returning(User.daily_request_count)
+        .execution_options(synchronize_session=False)
+    )
+    with time_stage('quota_check'):
+        count = db.session.execute(stmt).scalar_one_or_none()
         db.session.commit()
 
-    remaining = DAILY_LIMIT - user.daily_request_count
-    return remaining, remaining > 0
+    # No row updated means the limit would be exceeded
+    if count is None:
+        RATE_LIMIT_REJECTIONS.inc()
+        return False, 0
 
+    return True, DAILY_LIMIT - count
 
-def increment_request_count(user: User):
+
+def remaining_fields(remaining, tokens_spent=0):
+    """
+    The quota left, for a response body: remaining_requests, or in token mode
+    remaining_tokens (with remaining_requests null, as requests aren't limited).
+
+    Args:
+        remaining: The second value reserve_request() returned (plus any refunds)
+        tokens_spent: Tokens this request used (what save_usage() returned) - the
+                      token budget was checked before the call, so they still count
+    """
+    if _token_mode():
+        return {'remaining_requests': None, 'remaining_tokens': max(remaining - tokens_spent, 0)}
+    return {'remaining_requests': remaining}
+
+
+def refund_request(user_id, amount=1):
     """
-    Increments the user's daily request count by 1.
-    Call this AFTER a successful OpenAI call.
+    Gives back requests reserved by reserve_request() when the upstream call failed.
+    Only refunds within the same day, so a refund can't eat into tomorrow's quota.
+    Does not commit - run it inside the request's unit_of_work().
 
     Args:
-        user: The User model instance
+        user_id: The user's id
+        amount: Number of requests to give back
+
+    Returns:
+        int: Requests given back (0 in token mode, where nothing was reserved, or if
+             the reservation no longer applies)
     """
-    user.daily_request_count += 1
-    db.session.commit()
\ No newline at end of file
+    if _token_mode():
+        return 0
+
+    stmt = (
+        update(User)
+        .where(
+            User.id == user_id,
+            User.last_request_date == date.today(),
+            User.daily_request_count >= amount,
+        )
+        .values(daily_request_count=User.daily_request_count - amount)
+        .execution_options(synchronize_session=False)
+    )
+    result = db.session.execute(stmt)
+    # No row matched (the day rolled over, or the count was reset) - nothing given back
+    return amount if result.rowcount else 0
@@ -0,0 +1,271 @@
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from app.services.metrics import RESPONSE_CACHE_EVICTIONS, RESPONSE_CACHE_LOOKUPS
+
+
+def normalize_prompt(text):
+    """Lowercases and collapses whitespace so trivially different prompts share a cache entry."""
+    return ' '.join(text.lower().split())
+
+
+def make_cache_key(system_prompt, model, user_prompt):
+    """
+    Builds a stable cache key for a generation request.
+
+    Args:
+        system_prompt: The system prompt sent to the model
+        model: The model name (e.g., "gpt-4o-mini")
+        user_prompt: The built user prompt (e.g., output of build_facts_prompt)
+
+    Returns:
+        str: Hex digest identifying the request
+    """
+    payload = json.dumps([system_prompt, model, normalize_prompt(user_prompt)])
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class LRUCache:
+    """Bounded in-process cache with per-entry expiry. Least recently used entries are evicted first."""
+
+    def __init__(self, max_entries=1024):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+
+            value, expires_at = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                return None
+
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl):
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() + ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class FileCache:
+    """
+    Shared cache tier backed by a directory, one file per key.
+    Every gunicorn worker on the host sees the same entries.
+
+    Each file's mtime is set to its expiry time, so a sweep (at most every
+    sweep_interval seconds per process, run from set()) can drop expired
+    entries - and then the soonest-expiring ones beyond max_entries - from
+    stat() alone, without reading any files.
+    """
+
+    def __init__(self, directory, max_entries=10000, sweep_interval=60):
+        self.directory = directory
+        self.max_entries = max_entries
+        self.sweep_interval = sweep_interval
+        self._next_sweep = time.monotonic() + sweep_interval
+        self._sweep_lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.directory, f'{key}.json')
+
+    def get(self, key):
+        path = self._path(key)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+
+        if entry['expires_at'] <= time.time():
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            return None
+
+        return entry['value'], entry['expires_at'] - time.time()
+
+    def set(self, key, value, ttl):
+        expires_at = time.time() + ttl
+        tmp_path = None
+        try:
+            # Write to a temp file and rename so readers never see a partial entry
+            fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump({'value': value, 'expires_at': expires_at}, f)
+            os.utime(tmp_path, (expires_at, expires_at))
+            os.replace(tmp_path, self._path(key))
+        except OSError:
+            if tmp_path is not None:
+                try:
+                    os.remove(tmp_path)
+                except OSError:
+                    pass
+
+        if time.monotonic() >= self._next_sweep:
+            self.sweep()
+
+    def sweep(self):
+        """
+        Removes expired entries and, past max_entries, the ones expiring soonest.
+        Also clears temp files left behind by a crashed writer.
+
+        Returns:
+            int: Number of files removed
+        """
+        # One sweep per process at a time; other workers may sweep concurrently, which is harmless
+        if not self._sweep_lock.acquire(blocking=False):
+            return 0
+        try:
+            self._next_sweep = time.monotonic() + self.sweep_interval
+            now = time.time()
+            live = []
+            expired = []
+            try:
+                with os.scandir(self.directory) as entries:
+                    for entry in entries:
+                        try:
+                            mtime = entry.stat().st_mtime
+                        except OSError:
+                            continue
+                        if entry.name.endswith('.json'):
+                            (expired if mtime <= now else live).append((mtime, entry.path))
+                        elif entry.name.endswith('.tmp') and mtime < now - self.sweep_interval:
+                            # Left behind by a writer that died between mkstemp() and the rename
+                            expired.append((mtime, entry.path))
+            except OSError:
+                return 0
+
+            live.sort()
+            overflow = live[:max(len(live) - self.max_entries, 0)]
+            return self._remove(expired, 'expired') + self._remove(overflow, 'size')
+        finally:
+            self._sweep_lock.release()
+
+    @staticmethod
+    def _remove(entries, reason):
+        removed = 0
+        for _, path in entries:
+            try:
+                os.remove(path)
+                removed += 1
+            except OSError:
+                pass
+        if removed:
+            RESPONSE_CACHE_EVICTIONS.labels(reason).inc(removed)
+        return removed
+
+    def clear(self):
+        for name in os.listdir(self.directory):
+            if name.endswith('.json'):
+                try:
+                    os.remove(os.path.join(self.directory, name))
+                except OSError:
+                    pass
+
+
+# stats() counter name -> result label of response_cache_lookups_total
+_LOOKUP_RESULTS = {'local_hits': 'local_hit', 'shared_hits': 'shared_hit', 'misses': 'miss'}
+
+
+class ResponseCache:
+    """
+    Two-tier cache for generated responses.
+
+    The local tier is a bounded LRU per worker process. The optional shared tier
+    (RESPONSE_CACHE_DIR) is consulted on a local miss, and hits are promoted into
+    the local tier. TTLs are configured per feature in RESPONSE_CACHE_TTL; a
+    feature with no TTL (or 0) is not cached.
+    """
+
+    def __init__(self):
+        self.local = LRUCache()
+        self.shared = None
+        self.ttls = {}
+        self._lock = threading.Lock()
+        self._counters = {'local_hits': 0, 'shared_hits': 0, 'misses': 0}
+
+    def init_app(self, app):
+        self.local = LRUCache(app.config['RESPONSE_CACHE_MAX_ENTRIES'])
+        self.ttls = dict(app.config['RESPONSE_CACHE_TTL'])
+        cache_dir = app.config.get('RESPONSE_CACHE_DIR')
+        self.shared = FileCache(
+            cache_dir,
+            max_entries=app.config['RESPONSE_CACHE_DIR_MAX_ENTRIES'],
+            sweep_interval=app.config['RESPONSE_CACHE_SWEEP_INTERVAL'],
+        ) if cache_dir else None
+        app.extensions['response_cache'] = self
+
+    def ttl_for(self, feature):
+        """Returns the TTL in seconds for a feature, or 0 if it shouldn't be cached."""
+        return self.ttls.get(feature) or 0
+
+    def _count(self, name):
+        with self._lock:
+            self._counters[name] += 1
+        RESPONSE_CACHE_LOOKUPS.labels(_LOOKUP_RESULTS[name]).inc()
+
+    def get(self, key):
+        value = self.local.get(key)
+        if value is not None:
+            self._count('local_hits')
+            return value
+
+        if self.shared is not None:
+            entry = self.shared.get(key)
+            if entry is not None:
+                value, ttl_left = entry
+                self.local.set(key, value, ttl_left)
+                self._count('shared_hits')
+                return value
+
+        self._count('misses')
+        return None
+
+    def set(self, key, value, ttl):
+        self.local.set(key, value, ttl)
+        if self.shared is not None:
+            self.shared.set(key, value, ttl)
+
+    def clear(self):
+        self.local.clear()
+        if self.shared is not None:
+            self.shared.clear()
+
+    def stats(self):
+        """Returns hit/miss counters for this worker process."""
+        with self._lock:
+            counters = dict(self._counters)
+
+        lookups = sum(counters.values())
+        hits = counters['local_hits'] + counters['shared_hits']
+        counters['entries'] = len(self.local)
+        counters['hit_ratio'] = hits / lookups if lookups else 0.0
+        return counters
+
+
+response_cache = ResponseCache()
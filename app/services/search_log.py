@@ -0,0 +1,181 @@
+import atexit
+import queue
+import threading
+import time
+from datetime import datetime
+from app.services.per_process import PerProcess
+from app.services.trending import record_searches
+from app.services.unit_of_work import unit_of_work
+
+_STOP = object()
+
+
+class SearchLogBuffer:
+    """
+    Write-behind buffer for facts/quotes search history.
+
+    Requests only enqueue (user_id, topic, feature, searched_at) events. A
+    background thread per worker writes them with record_searches() - one
+    multi-row insert plus one rollup upsert - whenever SEARCH_LOG_BATCH_SIZE
+    events are queued or SEARCH_LOG_FLUSH_INTERVAL_MS has passed since the
+    first one, whichever comes first.
+
+    The queue holds at most SEARCH_LOG_MAX_PENDING events. When it is full
+    (the DB is falling behind) requests block for up to
+    SEARCH_LOG_ENQUEUE_TIMEOUT_MS and then write their own events
+    synchronously, so searches are slowed down rather than dropped.
+
+    A batch that fails to write is retried SEARCH_LOG_MAX_ATTEMPTS times in all,
+    with a doubling delay starting at SEARCH_LOG_RETRY_DELAY_MS, and only then
+    dropped (and counted as failed).
+    """
+
+    def __init__(self):
+        self.app = None
+        self.enabled = False
+        self.batch_size = 100
+        self.flush_interval = 0.5
+        self.max_pending = 10000
+        self.enqueue_timeout = 0.25
+        self.max_attempts = 3
+        self.retry_delay = 0.5
+        self._queue = None
+        self._flusher = PerProcess(self._start_flusher)
+        self._atexit_registered = False
+        self._stats_lock = threading.Lock()
+        self._counters = {'queued': 0, 'flushed': 0, 'batches': 0, 'sync_writes': 0, 'retries': 0, 'failed': 0}
+
+    def init_app(self, app):
+        self.app = app
+        self.enabled = app.config['SEARCH_LOG_BUFFERED']
+        self.batch_size = app.config['SEARCH_LOG_BATCH_SIZE']
+        self.flush_interval = app.config['SEARCH_LOG_FLUSH_INTERVAL_MS'] / 1000
+        self.max_pending = app.config['SEARCH_LOG_MAX_PENDING']
+        self.enqueue_timeout = app.config['SEARCH_LOG_ENQUEUE_TIMEOUT_MS'] / 1000
+        self.max_attempts = max(app.config['SEARCH_LOG_MAX_ATTEMPTS'], 1)
+        self.retry_delay = app.config['SEARCH_LOG_RETRY_DELAY_MS'] / 1000
+        app.extensions['search_log'] = self
+        # Once per process, however many apps are created (tests, CLI commands)
+        if not self._atexit_registered:
+            atexit.register(self.shutdown)
+            self._atexit_registered = True
+
+    def _count(self, name, amount=1):
+        with self._stats_lock:
+            self._counters[name] += amount
+
+    def _start_flusher(self):
+        # Started lazily, and again after a fork - threads don't survive into gunicorn workers
+        self._queue = queue.Queue(maxsize=self.max_pending)
+        thread = threading.Thread(target=self._run, name='search-log-flusher', daemon=True)
+        thread.start()
+        return thread
+
+    def record(self, user_id, topic, feature):
+        """Logs one facts/quotes search made now."""
+        self.record_many([(user_id, topic, feature)])
+
+    def record_many(self, searches):
+        """
+        Logs several searches made now.
+
+        Args:
+            searches: Iterable of (user_id, topic, feature) tuples
+        """
+        now = datetime.utcnow()
+        events = [(user_id, topic, feature, now) for user_id, topic, feature in searches]
+        if not events:
+            return
+
+        if not self.enabled:
+            self._write_now(events)
+            return
+
+        self._flusher.get()
+        for i, event in enumerate(events):
+            try:
+                self._queue.put(event, timeout=self.enqueue_timeout)
+                self._count('queued')
+            except queue.Full:
+                # Back-pressure: the flusher can't keep up, so pay for the write here
+                self._write_now(events[i:])
+                return
+
+    def _write_now(self, events):
+        with unit_of_work():
+            record_searches(events)
+        self._count('sync_writes', len(events))
+
+    def _run(self):
+        while True:
+            event = self._queue.get()
+            if event is _STOP:
+                return
+
+            batch = [event]
+            stopping = False
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    event = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if event is _STOP:
+                    stopping = True
+                    break
+                batch.append(event)
+
+            self._flush(batch)
+            if stopping:
+                return
+
+    def _flush(self, batch):
+        for attempt in range(1, self.max_attempts + 1):
+            try:
+                with self.app.app_context():
+                    with unit_of_work():
+                        record_searches(batch)
+            except Exception:
+                if attempt == self.max_attempts:
+                    self._count('failed', len(batch))
+                    self.app.logger.exception(
+                        'Dropping %d buffered searches after %d failed writes', len(batch), attempt
+                    )
+                    return
+                self._count('retries')
+                self.app.logger.warning('Failed to write %d buffered searches, retrying', len(batch), exc_info=True)
+                # New searches keep queueing meanwhile; if the queue fills, requests write their own
+                time.sleep(self.retry_delay * 2 ** (attempt - 1))
+            else:
+                self._count('flushed', len(batch))
+                self._count('batches')
+                return
+
+    def shutdown(self, timeout=5):
+        """Flushes everything still queued and stops the flusher. Safe to call more than once."""
+        thread = self._flusher.clear()
+        if thread is None or not thread.is_alive():
+            return
+
+        # Outside the lock, and bounded: the queue may be full while the flusher is stuck on the DB
+        try:
+            self._queue.put(_STOP, timeout=timeout)
+        except queue.Full:
+            self.app.logger.warning(
+                'Search log still full at shutdown, %d buffered searches not written', self._queue.qsize()
+            )
+            return
+        thread.join(timeout)
+
+    def stats(self):
+        """Returns buffer counters for this worker process."""
+        with self._stats_lock:
+            counters = dict(self._counters)
+        counters['pending'] = self._queue.qsize() if self._queue is not None else 0
+        return counters
+
+
+search_log = SearchLogBuffer()
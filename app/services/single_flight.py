@@ -0,0 +1,166 @@
+import fcntl
+import os
+import threading
+import time
+from app.services.metrics import SINGLE_FLIGHT_CALLS, SINGLE_FLIGHT_FOLLOWER_TIMEOUTS
+
+_ROLES = {'leaders': 'leader', 'followers': 'follower', 'shared_followers': 'shared_follower'}
+
+
+class _Call:
+    """One in-flight upstream call that other requests can wait on."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    Deduplicates identical concurrent calls. The first caller for a key (the
+    leader) runs the function; callers arriving while it runs (followers) wait
+    and share its result or exception.
+
+    With SINGLE_FLIGHT_LOCK_DIR set, leaders in different worker processes on
+    the same host also take a per-key file lock. A worker that had to wait for
+    the lock calls `recheck` first - normally a shared cache lookup - and only
+    calls upstream itself if that still misses.
+
+    Leader/follower counts are exported as Prometheus counters.
+    """
+
+    def __init__(self):
+        self.lock_dir = None
+        self.lock_timeout = 60
+        self._calls = {}
+        self._lock = threading.Lock()
+        self._counters = {'leaders': 0, 'followers': 0, 'shared_followers': 0}
+
+    def init_app(self, app):
+        self.lock_dir = app.config.get('SINGLE_FLIGHT_LOCK_DIR')
+        self.lock_timeout = app.config['OPENAI_TIMEOUT']
+        if self.lock_dir:
+            os.makedirs(self.lock_dir, exist_ok=True)
+        app.extensions['single_flight'] = self
+
+    def _count(self, name):
+        with self._lock:
+            self._counters[name] += 1
+        SINGLE_FLIGHT_CALLS.labels(_ROLES[name]).inc()
+
+    def do(self, key, fn, recheck=None, timeout=None):
+        """
+        Runs fn() once per key across concurrent callers.
+
+        Args:
+            key: Identifies identical calls (e.g., the response cache key)
+            fn: The call to make; its return value is shared with every waiter
+            recheck: Optional callable returning a result (or None) that another
+                     worker may have produced while this one waited on the host lock
+            timeout: Longest a follower waits for the leader, in seconds (None: no limit)
+
+        Returns:
+            The result of fn() (or of recheck())
+
+        Raises:
+            TimeoutError: If this caller was a follower and the leader took longer than `timeout`
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = _Call()
+                self._calls[key] = call
+
+        if not leader:
+            self._count('followers')
+            if not call.done.wait(timeout):
+                SINGLE_FLIGHT_FOLLOWER_TIMEOUTS.inc()
+                raise TimeoutError('Timed out waiting for an identical in-flight call')
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = self._lead(key, fn, recheck)
+            return call.result
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    def _lead(self, key, fn, recheck):
+        if not self.lock_dir:
+            self._count('leaders')
+            return fn()
+
+        path = os.path.join(self.lock_dir, f'{key}.lock')
+        lock_file, waited, locked = self._acquire(path)
+        try:
+            if waited and recheck is not None:
+                result = recheck()
+                if result is not None:
+                    self._count('shared_followers')
+                    return result
+            self._count('leaders')
+            return fn()
+        finally:
+            if locked:
+                # Removed before unlocking, so the directory doesn't keep a file per key ever
+                # seen; anyone already waiting on this file notices and locks a fresh one
+                try:
+                    os.unlink(path)
+                except FileNotFoundError:
+                    pass
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+            lock_file.close()
+
+    def _acquire(self, path):
+        """
+        Takes the host-wide lock for a key, polling rather than blocking so a
+        gevent worker's other greenlets keep running meanwhile.
+
+        Returns:
+            tuple: (lock_file, waited: bool - another process held the lock,
+                    locked: bool - False if we gave up on a stuck holder)
+        """
+        deadline = time.monotonic() + self.lock_timeout
+        waited = False
+        while True:
+            lock_file = open(path, 'a')
+            while True:
+                try:
+                    fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                    break
+                except BlockingIOError:
+                    if time.monotonic() >= deadline:
+                        # Holder is stuck - give up on coalescing rather than on the request
+                        return lock_file, waited, False
+                    waited = True
+                    time.sleep(0.05)
+
+            # The previous holder removes the file when done; a lock on a removed file guards nothing
+            try:
+                if os.fstat(lock_file.fileno()).st_ino == os.stat(path).st_ino:
+                    return lock_file, waited, True
+            except FileNotFoundError:
+                pass
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+            lock_file.close()
+
+    def stats(self):
+        """Returns coalescing counters for this worker process."""
+        with self._lock:
+            counters = dict(self._counters)
+
+        total = sum(counters.values())
+        coalesced = counters['followers'] + counters['shared_followers']
+        counters['coalescing_ratio'] = coalesced / total if total else 0.0
+        return counters
+
+
+single_flight = SingleFlight()
@@ -0,0 +1,122 @@
+from datetime import date, timedelta
+from flask import g
+from sqlalchemy import func
+from app import db
+from app.models.token_usage import TokenUsage
+from app.services.upsert import upsert
+
+
+def track(feature, usage):
+    """
+    Notes the tokens one upstream call used, until save_usage() writes them.
+    Kept on the app context, so each request (or batch worker thread) has its own tally.
+
+    Args:
+        feature: "facts", "quotes", "conversation" or "summary"
+        usage: Usage(prompt_tokens, completion_tokens) from the provider
+    """
+    pending = g.setdefault('token_usage', {})
+    requests, prompt_tokens, completion_tokens = pending.get(feature, (0, 0, 0))
+    pending[feature] = (requests + 1, prompt_tokens + usage.prompt_tokens, completion_tokens + usage.completion_tokens)
+
+
+def take_pending():
+    """Returns and clears this context's tally: feature -> (requests, prompt_tokens, completion_tokens)."""
+    return g.pop('token_usage', {})
+
+
+def merge_pending(*tallies):
+    """Adds up tallies returned by take_pending() (e.g., from batch worker threads)."""
+    merged = {}
+    for tally in tallies:
+        for feature, counts in tally.items():
+            merged[feature] = tuple(a + b for a, b in zip(merged.get(feature, (0, 0, 0)), counts))
+    return merged
+
+
+def save_usage(user_id, pending=None):
+    """
+    Adds tracked usage to the user's daily totals in one INSERT ... ON CONFLICT DO UPDATE.
+    Does not commit - run it inside the request's unit_of_work().
+
+    Args:
+        user_id: The user the calls were made for
+        pending: A tally to save instead of this context's (see take_pending())
+
+    Returns:
+        int: Tokens saved (prompt + completion)
+    """
+    if pending is None:
+        pending = take_pending()
+    if not pending:
+        return 0
+
+    today = date.today()
+    rows = [
+        {
+            'user_id': user_id,
+            'day': today,
+            'feature': feature,
+            'requests': requests,
+            'prompt_tokens': prompt_tokens,
+            'completion_tokens': completion_tokens,
+        }
+        for feature, (requests, prompt_tokens, completion_tokens) in pending.items()
+    ]
+    upsert(TokenUsage, rows, ['user_id', 'day', 'feature'], lambda excluded: {
+        'requests': TokenUsage.requests + excluded['requests'],
+        'prompt_tokens': TokenUsage.prompt_tokens + excluded['prompt_tokens'],
+        'completion_tokens': TokenUsage.completion_tokens + excluded['completion_tokens'],
+    })
+    return sum(prompt_tokens + completion_tokens for _, prompt_tokens, completion_tokens in pending.values())
+
+
+def tokens_used_today_query(user_id):
+    """Builds the tokens_used_today() query (kept separate so the query plan check can EXPLAIN it)."""
+    return db.session.query(
+        func.coalesce(func.sum(TokenUsage.prompt_tokens + TokenUsage.completion_tokens), 0)
+    ).filter(
+        TokenUsage.user_id == user_id,
+        TokenUsage.day == date.today()
+    )
+
+
+def tokens_used_today(user_id):
+    """Total prompt + completion tokens the user has used today."""
+    return int(tokens_used_today_query(user_id).scalar())
+
+
+def get_daily_usage(user_id, days):
+    """
+    Returns the user's usage for the last `days` days (today included), newest first.
+
+    Returns:
+        list: One dict per day with usage, with totals and a per-feature breakdown
+    """
+    since = date.today() - timedelta(days=days - 1)
+    rows = TokenUsage.query.filter(
+        TokenUsage.user_id == user_id,
+        TokenUsage.day >= since
+    ).order_by(TokenUsage.day.desc(), TokenUsage.feature).all()
+
+    by_day = {}
+    for row in rows:
+        day = by_day.setdefault(row.day, {
+            'date': row.day.isoformat(),
+            'requests': 0,
+            'prompt_tokens': 0,
+            'completion_tokens': 0,
+            'total_tokens': 0,
+            'features': {},
+        })
+        day['requests'] += row.requests
+        day['prompt_tokens'] += row.prompt_tokens
+        day['completion_tokens'] += row.completion_tokens
+        day['total_tokens'] += row.prompt_tokens + row.completion_tokens
+        day['features'][row.feature] = {
+            'requests': row.requests,
+            'prompt_tokens': row.prompt_tokens,
+            'completion_tokens': row.completion_tokens,
+        }
+
+    return list(by_day.values())
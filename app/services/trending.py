@@ -0,0 +1,148 @@
+from collections import Counter
+from datetime import datetime
+from sqlalchemy import func, insert, text
+from app import db
+from app.models.searched_item import SearchedItem
+from app.models.topic_search_count import TopicSearchCount, ALL_FEATURES, ALL_TIME
+from app.services.upsert import upsert
+
+TRENDING_LIMIT = 10
+
+
+def normalize_topic(topic):
+    return topic.lower().strip()
+
+
+def _rollup_keys(feature, topic, day):
+    """Every rollup row a single search contributes to."""
+    bucket = day.isoformat()
+    return [
+        (feature, topic, bucket),
+        (feature, topic, ALL_TIME),
+        (ALL_FEATURES, topic, bucket),
+        (ALL_FEATURES, topic, ALL_TIME),
+    ]
+
+
+def _upsert_counts(counts):
+    """
+    Adds the given increments to the rollup table in one INSERT ... ON CONFLICT DO UPDATE.
+
+    Args:
+        counts: Counter mapping (feature, topic, bucket) to the amount to add
+    """
+    if not counts:
+        return
+
+    rows = [
+        {'feature': feature, 'topic': topic, 'bucket': bucket, 'count': amount}
+        for (feature, topic, bucket), amount in counts.items()
+    ]
+    upsert(
+        TopicSearchCount, rows, ['feature', 'topic', 'bucket'],
+        lambda excluded: {'count': TopicSearchCount.count + excluded['count']},
+    )
+
+
+def record_searches(searches):
+    """
+    Saves searches to history with one multi-row INSERT and bumps their trending rollups.
+    Does not commit - the caller owns the transaction.
+
+    Args:
+        searches: Iterable of (user_id, topic, feature, searched_at) tuples
+    """
+    rows = []
+    counts = Counter()
+
+    for user_id, topic, feature, searched_at in searches:
+        topic = normalize_topic(topic)
+        rows.append({'user_id': user_id, 'topic': topic, 'feature': feature, 'created_at': searched_at})
+        counts.update(_rollup_keys(feature, topic, searched_at.date()))
+
+    if rows:
+        db.session.execute(insert(SearchedItem), rows)
+    _upsert_counts(counts)
+
+
+def record_search(user_id, topic, feature):
+    """Saves a single facts/quotes search made now. See record_searches()."""
+    record_searches([(user_id, topic, feature, datetime.utcnow())])
+
+
+def top_topics_query(feature=None, limit=TRENDING_LIMIT):
+    """Builds the trending query (kept separate so the query plan check can EXPLAIN it)."""
+    return db.session.query(
+        TopicSearchCount.topic,
+        TopicSearchCount.count,
+    ).filter(
+        TopicSearchCount.feature == (feature or ALL_FEATURES),
+        TopicSearchCount.bucket == ALL_TIME,
+    ).order_by(TopicSearchCount.count.desc()).limit(limit)
+
+
+def get_top_topics(feature=None, limit=TRENDING_LIMIT):
+    """
+    Returns the most searched topics of all time, read straight from the rollup index.
+
+    Args:
+        feature: "facts", "quotes", or None for both combined
+        limit: How many topics to return
+
+    Returns:
+        list: Rows with .topic and .count, most searched first
+    """
+    return top_topics_query(feature, limit).all()
+
+
+def _lock_search_history():
+    """
+    Holds off new searches until the current transaction ends, so a rebuild
+    can't miss or double-count searches recorded while it runs. Readers are
+    not blocked - they keep seeing the old rollups until the commit.
+    """
+    if db.session.get_bind().dialect.name == 'postgresql':
+        # SHARE conflicts with the ROW EXCLUSIVE lock record_searches() needs to insert history
+        db.session.execute(text('LOCK TABLE searched_items IN SHARE MODE'))
+    # SQLite allows one writer per database - the rollup DELETE, issued next, takes that lock
+
+
+def backfill_rollups(batch_size=1000):
+    """
+    Rebuilds the whole rollup table from searched_items history.
+    Does not commit - the caller owns the transaction. New searches wait
+    until it commits (see _lock_search_history()).
+
+    Returns:
+        int: Number of rollup rows written
+    """
+    _lock_search_history()
+    db.session.query(TopicSearchCount).delete()
+
+    day = func.date(SearchedItem.created_at)
+    history = db.session.query(
+        SearchedItem.feature,
+        SearchedItem.topic,
+        day,
+        func.count(SearchedItem.id),
+    ).group_by(SearchedItem.feature, SearchedItem.topic, day)
+
+    counts = Counter()
+    for feature, topic, searched_on, amount in history.yield_per(batch_size):
+        topic = normalize_topic(topic)
+        keys = [(feature, topic, ALL_TIME), (ALL_FEATURES, topic, ALL_TIME)]
+        if searched_on is not None:
+            # Postgres returns a date, SQLite a "YYYY-MM-DD" string
+            bucket = str(searched_on)[:10]
+            keys += [(feature, topic, bucket), (ALL_FEATURES, topic, bucket)]
+        for key in keys:
+            counts[key] += amount
+
+    rows = [
+        {'feature': feature, 'topic': topic, 'bucket': bucket, 'count': amount}
+        for (feature, topic, bucket), amount in counts.items()
+    ]
+    for start in range(0, len(rows), batch_size):
+        db.session.execute(insert(TopicSearchCount), rows[start:start + batch_size])
+
+    return len(rows)
@@ -0,0 +1,26 @@
+from contextlib import contextmanager
+from app import db
+
+
+@contextmanager
+def unit_of_work():
+    """
+    Collects a request's writes into a single commit.
+
+    Add objects and run write statements inside the block; everything is
+    flushed and committed once when it exits, or rolled back if it raises.
+    Routes open it only after the upstream call has returned, so each AI
+    request pays for one commit instead of one per row.
+
+    Usage:
+        with unit_of_work() as session:
+            session.add(message)
+            record_search(user_id, topic, 'facts')
+    """
+    session = db.session
+    try:
+        yield session
+        session.commit()
+    except Exception:
+        session.rollback()
+        raise
@@ -0,0 +1,30 @@
+from operator import itemgetter
+from sqlalchemy.dialects import postgresql, sqlite
+from app import db
+
+_UPSERT_DIALECTS = {
+    'postgresql': postgresql.insert,
+    'sqlite': sqlite.insert,
+}
+
+
+def upsert(model, rows, conflict_columns, update):
+    """
+    Inserts rows in one INSERT ... ON CONFLICT DO UPDATE, updating the row
+    already there when the key exists. Does not commit - the caller owns the
+    transaction.
+
+    Args:
+        model: The model to write to
+        rows: List of column dicts
+        conflict_columns: Names of the unique key columns
+        update: Function taking the statement's `excluded` row and returning
+            the {column: new value} to set on a conflict
+    """
+    insert = _UPSERT_DIALECTS[db.session.get_bind().dialect.name]
+
+    # Sorted so concurrent upserts always lock rows in the same order
+    rows = sorted(rows, key=itemgetter(*conflict_columns))
+    stmt = insert(model).values(rows)
+    stmt = stmt.on_conflict_do_update(index_elements=conflict_columns, set_=update(stmt.excluded))
+    db.session.execute(stmt)
@@ -0,0 +1,222 @@
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from app.services.llm_provider import ProviderTimeout, is_retryable
+from app.services.metrics import (
+    UPSTREAM_HEDGES,
+    UPSTREAM_HEDGE_WINS,
+    UPSTREAM_RETRIES,
+    UPSTREAM_WASTED_TOKENS,
+)
+from app.services.per_process import PerProcess
+
+# Recent successful call latencies kept per feature for the hedge delay
+LATENCY_WINDOW = 200
+# Don't hedge until there are enough samples for a meaningful percentile
+MIN_HEDGE_SAMPLES = 20
+
+
+def _percentile(values, pct):
+    ordered = sorted(values)
+    index = min(int(len(ordered) * pct / 100), len(ordered) - 1)
+    return ordered[index]
+
+
+class UpstreamPolicy:
+    """
+    Per-feature latency policy for LLM provider calls.
+
+    - Deadline: every call for a feature finishes or fails within
+      UPSTREAM_DEADLINE[feature] seconds, retries included. Each attempt gets
+      the time that's left as its timeout.
+    - Retries: up to UPSTREAM_MAX_RETRIES more attempts, only for retryable
+      errors (timeouts, connection failures, 429s, 5xx), after a full-jitter
+      backoff based on UPSTREAM_RETRY_BASE_DELAY.
+    - Hedging (UPSTREAM_HEDGE[feature]): if an attempt hasn't answered after
+      the feature's recent p95 latency (never less than UPSTREAM_HEDGE_MIN_DELAY),
+      a second identical request is sent and whichever answers first wins.
+      Roughly 5% of calls pay for a second request to cut the slowest tail.
+
+    Retries, hedges and the tokens spent on discarded answers are exported as
+    Prometheus counters.
+    """
+
+    def __init__(self):
+        self.deadlines = {}
+        self.hedged_features = set()
+        self.default_deadline = 30
+        self.max_retries = 2
+        self.retry_base_delay = 0.25
+        self.hedge_min_delay = 1.0
+        self.hedge_percentile = 95
+        self.max_hedge_threads = 64
+        self._latencies = {}
+        self._lock = threading.Lock()
+        self._executor = PerProcess(self._build_executor)
+
+    def init_app(self, app):
+        self.deadlines = dict(app.config['UPSTREAM_DEADLINE'])
+        self.hedged_features = {feature for feature, hedge in app.config['UPSTREAM_HEDGE'].items() if hedge}
+        self.default_deadline = app.config['OPENAI_TIMEOUT']
+        self.max_retries = app.config['UPSTREAM_MAX_RETRIES']
+        self.retry_base_delay = app.config['UPSTREAM_RETRY_BASE_DELAY']
+        self.hedge_min_delay = app.config['UPSTREAM_HEDGE_MIN_DELAY']
+        self.hedge_percentile = app.config['UPSTREAM_HEDGE_PERCENTILE']
+        self.max_hedge_threads = app.config['UPSTREAM_HEDGE_MAX_THREADS']
+        app.extensions['upstream_policy'] = self
+
+    def deadline_for(self, feature):
+        """Seconds a call for `feature` may take in total, retries included."""
+        return self.deadlines.get(feature, self.default_deadline)
+
+    def _build_executor(self):
+        # Threads don't survive a fork, so each worker process builds its own pool
+        return ThreadPoolExecutor(max_workers=self.max_hedge_threads, thread_name_prefix='upstream-hedge')
+
+    def _record_latency(self, feature, seconds):
+        with self._lock:
+            samples = self._latencies.get(feature)
+            if samples is None:
+                samples = self._latencies[feature] = deque(maxlen=LATENCY_WINDOW)
+            samples.append(seconds)
+
+    def hedge_delay(self, feature):
+        """Seconds to wait before hedging a call, or None while there's too little history."""
+        with self._lock:
+            samples = list(self._latencies.get(feature, ()))
+        if len(samples) < MIN_HEDGE_SAMPLES:
+            return None
+        return max(_percentile(samples, self.hedge_percentile), self.hedge_min_delay)
+
+    def _attempt(self, feature, fn, timeout):
+        started = time.monotonic()
+        result = fn(timeout)
+        self._record_latency(feature, time.monotonic() - started)
+        return result
+
+    def _backoff(self, feature, attempt, error, deadline):
+        """Sleeps before retry number `attempt`, or re-raises `error` if no retry is allowed."""
+        if not is_retryable(error) or attempt > self.max_retries:
+            raise error
+        delay = random.uniform(0, self.retry_base_delay * 2 ** (attempt - 1))
+        if time.monotonic() + delay >= deadline:
+            raise error
+        UPSTREAM_RETRIES.labels(feature).inc()
+        time.sleep(delay)
+
+    def call(self, feature, fn):
+        """
+        Runs a provider call under the feature's policy.
+
+        Args:
+            feature: "facts", "quotes", "conversation" or "summary"
+            fn: Makes one attempt; called with the attempt's timeout in seconds
+                and returns (content, Usage)
+
+        Returns:
+            The first successful attempt's (content, Usage)
+        """
+        deadline = time.monotonic() + self.deadline_for(feature)
+        attempt = 0
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise ProviderTimeout('Upstream deadline exceeded')
+            try:
+                if feature in self.hedged_features:
+                    return self._hedged(feature, fn, deadline)
+                return self._attempt(feature, fn, remaining)
+            except Exception as e:
+                attempt += 1
+                self._backoff(feature, attempt, e, deadline)
+
+    def _hedged(self, feature, fn, deadline):
+        delay = self.hedge_delay(feature)
+        if delay is None:
+            return self._attempt(feature, fn, deadline - time.monotonic())
+
+        executor = self._executor.get()
+        primary = executor.submit(self._attempt, feature, fn, deadline - time.monotonic())
+        done, _ = wait([primary], timeout=min(delay, deadline - time.monotonic()))
+        if primary in done:
+            return primary.result()
+
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            self._discard(feature, primary)
+            raise ProviderTimeout('Upstream deadline exceeded')
+
+        UPSTREAM_HEDGES.labels(feature).inc()
+        hedge = executor.submit(self._attempt, feature, fn, remaining)
+        pending = {primary, hedge}
+        error = None
+        while pending:
+            done, pending = wait(pending, timeout=max(deadline - time.monotonic(), 0), return_when=FIRST_COMPLETED)
+            if not done:
+                break
+            for future in done:
+                if future.exception() is None:
+                    if future is hedge:
+                        UPSTREAM_HEDGE_WINS.labels(feature).inc()
+                    for loser in pending:
+                        self._discard(feature, loser)
+                    return future.result()
+                error = error or future.exception()
+
+        for loser in pending:
+            self._discard(feature, loser)
+        raise error or ProviderTimeout('Upstream deadline exceeded')
+
+    @staticmethod
+    def _discard(feature, future):
+        """Lets a losing attempt finish in the background, counting the tokens it wasted."""
+        def count_tokens(f):
+            if not f.cancelled() and f.exception() is None:
+                usage = f.result()[1]
+                UPSTREAM_WASTED_TOKENS.labels(feature).inc(usage.prompt_tokens + usage.completion_tokens)
+
+        future.add_done_callback(count_tokens)
+
+    def stream(self, feature, open_stream):
+        """
+        Streams under the feature's deadline, retrying only failures that happen
+        before the first chunk (after that, the client has already seen output).
+        Streams are never hedged.
+
+        The deadline is checked between chunks: once it has passed, the stream
+        is closed and ProviderTimeout raised. A single stalled read is bounded
+        by the timeout its attempt was opened with.
+
+        Args:
+            feature: Usually "conversation"
+            open_stream: Called with a timeout in seconds; returns an iterator of chunks
+        """
+        deadline = time.monotonic() + self.deadline_for(feature)
+        attempt = 0
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise ProviderTimeout('Upstream deadline exceeded')
+            chunks = iter(open_stream(remaining))
+            try:
+                first = next(chunks)
+            except StopIteration:
+                return
+            except Exception as e:
+                attempt += 1
+                self._backoff(feature, attempt, e, deadline)
+                continue
+            yield first
+            for chunk in chunks:
+                if time.monotonic() > deadline:
+                    close = getattr(chunks, 'close', None)
+                    if close is not None:
+                        close()
+                    raise ProviderTimeout('Upstream deadline exceeded mid-stream')
+                yield chunk
+            return
+
+
+upstream_policy = UpstreamPolicy()
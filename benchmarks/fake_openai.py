@@ -0,0 +1,135 @@
+"""
+Local stand-in for the OpenAI chat completions API, used by the load benchmark.
+
+Answers POST /v1/chat/completions with schema-valid facts/quotes JSON (JSON
+mode) or a short chat reply, after a configurable delay. Streaming requests get
+Server-Sent Events chunks like the real API. Point the app at it with
+OPENAI_BASE_URL=http://127.0.0.1:<port>/v1.
+
+Run standalone (e.g., to back a gunicorn deployment under test):
+    python -m benchmarks.fake_openai --port 8090 --latency-ms 800 --jitter-ms 200
+"""
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+REPLY = 'This is a benchmark reply from the local OpenAI stand-in.'
+
+
+def _content_for(payload):
+    """Builds a reply body matching what the app's prompts ask for."""
+    if payload.get('response_format', {}).get('type') != 'json_object':
+        return REPLY
+
+    system_prompt = payload['messages'][0]['content']
+    if '"quotes"' in system_prompt:
+        quotes = [{'text': f'Benchmark quote {i}', 'author': 'Unknown'} for i in range(1, 6)]
+        return json.dumps({'quotes': quotes})
+    return json.dumps({'facts': [f'Benchmark fact {i}.' for i in range(1, 6)]})
+
+
+class FakeOpenAIHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'  # Keep-alive, like the real API
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_POST(self):
+        payload = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+        self.server.sleep()
+
+        content = _content_for(payload)
+        usage = {'prompt_tokens': 50, 'completion_tokens': 100, 'total_tokens': 150}
+        if payload.get('stream'):
+            self._stream(payload['model'], content, usage)
+            return
+
+        body = json.dumps({
+            'id': 'chatcmpl-bench',
+            'object': 'chat.completion',
+            'created': int(time.time()),
+            'model': payload['model'],
+            'choices': [{
+                'index': 0,
+                'finish_reason': 'stop',
+                'message': {'role': 'assistant', 'content': content},
+            }],
+            'usage': usage,
+        }).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _stream(self, model, content, usage):
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream')
+        self.send_header('Connection', 'close')
+        self.end_headers()
+
+        def chunk(delta, finish_reason=None, chunk_usage=None):
+            choices = [] if chunk_usage else [{'index': 0, 'delta': delta, 'finish_reason': finish_reason}]
+            data = {
+                'id': 'chatcmpl-bench',
+                'object': 'chat.completion.chunk',
+                'created': int(time.time()),
+                'model': model,
+                'choices': choices,
+                'usage': chunk_usage,
+            }
+            self.wfile.write(f'data: {json.dumps(data)}\n\n'.encode())
+
+        for word in content.split(' '):
+            chunk({'content': word + ' '})
+        chunk({}, finish_reason='stop')
+        chunk({}, chunk_usage=usage)
+        self.wfile.write(b'data: [DONE]\n\n')
+        self.close_connection = True
+
+
+class FakeOpenAIServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, host='127.0.0.1', port=0, latency_ms=500, jitter_ms=0, seed=None):
+        super().__init__((host, port), FakeOpenAIHandler)
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self._random = random.Random(seed)
+        self._random_lock = threading.Lock()
+
+    @property
+    def base_url(self):
+        host, port = self.server_address[:2]
+        return f'http://{host}:{port}/v1'
+
+    def sleep(self):
+        """Waits one upstream latency sample: normal around latency_ms, never negative."""
+        with self._random_lock:
+            delay = self._random.gauss(self.latency_ms, self.jitter_ms) if self.jitter_ms else self.latency_ms
+        time.sleep(max(delay, 0) / 1000)
+
+    def start(self):
+        """Serves in a daemon thread and returns self."""
+        threading.Thread(target=self.serve_forever, name='fake-openai', daemon=True).start()
+        return self
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8090)
+    parser.add_argument('--latency-ms', type=float, default=500, help='Mean upstream latency')
+    parser.add_argument('--jitter-ms', type=float, default=0, help='Standard deviation of the latency')
+    args = parser.parse_args()
+
+    server = FakeOpenAIServer(args.host, args.port, args.latency_ms, args.jitter_ms)
+    print(f'Fake OpenAI listening on {server.base_url}')
+    server.serve_forever()
+
+
+if __name__ == '__main__':
+    main()
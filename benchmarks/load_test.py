@@ -0,0 +1,396 @@
+"""
+End-to-end HTTP load benchmark.
+
+Boots create_app() on a local threaded HTTP server against a scratch database
+(SQLite by default, or --database-url for Postgres), with OpenAI replaced by
+benchmarks.fake_openai (or, with --upstream stub, the in-process stub provider). Every blueprint is then driven at the configured
+concurrency, one scenario at a time. Each scenario reports throughput,
+p50/p95/p99 latency, DB queries per request and the response cache hit ratio.
+
+Facts/quotes requests cycle through a few fixed topics, so after the first
+round they are mostly cache hits. --unique-topics gives every request its own
+topic, so each one goes upstream.
+
+    python -m benchmarks.load_test --concurrency 32 --requests 400 --output bench.json
+    python -m benchmarks.load_test --output new.json --compare bench.json
+    python -m benchmarks.load_test --scenarios facts.generate,quotes.generate --unique-topics
+
+Use a disposable database: tables are created if missing and benchmark users,
+conversations and favourites are added to it.
+"""
+import argparse
+import json
+import logging
+import math
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import httpx
+
+from benchmarks.fake_openai import FakeOpenAIServer
+
+PASSWORD = 'benchmark-password'
+FAVOURITES_PER_USER = 50
+TOPICS = ['black holes', 'octopuses', 'roman empire', 'volcanoes', 'jazz', 'honey bees',
+          'quantum computing', 'the moon', 'chess', 'coffee']
+
+
+def _percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(math.ceil(pct / 100 * len(sorted_values)), 1)
+    return sorted_values[rank - 1]
+
+
+class Fixture:
+    """Users, tokens and rows the scenarios send requests against."""
+
+    def __init__(self, run_id, user_ids, tokens, conversation_ids, unique_topics=False):
+        self.run_id = run_id
+        self.unique_topics = unique_topics
+        self.user_ids = user_ids
+        self.tokens = tokens
+        self.conversation_ids = conversation_ids  # Per user, each with room for more messages
+        self._next_conversation = [0] * len(user_ids)
+        self._lock = threading.Lock()
+
+    def user(self, i):
+        """Spreads requests round-robin across users so quotas aren't the bottleneck."""
+        return i % len(self.user_ids)
+
+    def headers(self, i):
+        return {'Authorization': f'Bearer {self.tokens[self.user(i)]}'}
+
+    def topic(self, i):
+        """A fixed topic (mostly cache hits after the first round), or a new one per request."""
+        topic = TOPICS[i % len(TOPICS)]
+        return f'{topic} {self.run_id}-{i}' if self.unique_topics else topic
+
+    def take_conversation(self, i):
+        """Hands out each seeded conversation once, so none hits the message limit."""
+        u = self.user(i)
+        with self._lock:
+            index = self._next_conversation[u]
+            self._next_conversation[u] += 1
+        return self.conversation_ids[u][index]
+
+
+# name -> builder(fixture, i) returning (method, path, json body or None, headers)
+SCENARIOS = {
+    'auth.register': lambda f, i: ('POST', '/auth/register', {
+        'email': f'bench-{f.run_id}-new{i}@example.com',
+        'username': f'bench-{f.run_id}-new{i}',
+        'password': PASSWORD,
+    }, None),
+    'auth.login': lambda f, i: ('POST', '/auth/login', {
+        'email': f'bench-{f.run_id}-{f.user(i)}@example.com',
+        'password': PASSWORD,
+    }, None),
+    'facts.generate': lambda f, i: ('POST', '/facts/', {'topic': f.topic(i)}, f.headers(i)),
+    'quotes.generate': lambda f, i: ('POST', '/quotes/', {'topic': f.topic(i)}, f.headers(i)),
+    'conversation.start': lambda f, i: ('POST', '/conversation/start', {'message': f'Question {i}?'}, f.headers(i)),
+    'conversation.message': lambda f, i: ('POST', '/conversation/message', {
+        'conversation_id': f.take_conversation(i),
+        'message': f'Follow-up {i}?',
+    }, f.headers(i)),
+    'conversation.list': lambda f, i: ('GET', '/conversation/conversations', None, f.headers(i)),
+    'conversation.get': lambda f, i: (
+        'GET', f'/conversation/conversations/{f.conversation_ids[f.user(i)][0]}', None, f.headers(i)
+    ),
+    'favourites.add': lambda f, i: ('POST', '/favourites/', {
+        'category': 'fact',
+        'content': f'Benchmark favourite {f.run_id}-{i}',
+        'topic': TOPICS[i % len(TOPICS)],
+    }, f.headers(i)),
+    'favourites.list': lambda f, i: ('GET', '/favourites/', None, f.headers(i)),
+    'trending.list': lambda f, i: ('GET', '/trending/', None, f.headers(i)),
+}
+
+
+def _install_query_counter(app, db):
+    """Counts SQL statements per request and reports them in an X-Bench-Queries header."""
+    from sqlalchemy import event
+
+    local = threading.local()
+
+    with app.app_context():
+        engine = db.engine
+
+    @event.listens_for(engine, 'before_cursor_execute')
+    def count_query(conn, cursor, statement, parameters, context, executemany):
+        local.queries = getattr(local, 'queries', 0) + 1
+
+    @app.before_request
+    def reset_count():
+        local.queries = 0
+
+    @app.after_request
+    def report_count(response):
+        response.headers['X-Bench-Queries'] = str(getattr(local, 'queries', 0))
+        return response
+
+
+def _seed(app, db, users, conversations_per_user, unique_topics=False):
+    """Creates benchmark users (with tokens), conversations, favourites and trending rows."""
+    from flask_jwt_extended import create_access_token
+    from werkzeug.security import generate_password_hash
+    from app.models import SavedItem, User
+    from app.models.conversation import Conversation
+    from app.models.conversation_message import ConversationMessage
+    from app.services.trending import record_searches
+
+    run_id = uuid.uuid4().hex[:8]
+    # Same parameters as the app, so logins don't trigger a rehash
+    password_hash = generate_password_hash(PASSWORD, method=app.config['PASSWORD_HASH_METHOD'])
+
+    with app.app_context():
+        db.create_all()
+
+        accounts = [
+            User(username=f'bench-{run_id}-{u}', email=f'bench-{run_id}-{u}@example.com', password_hash=password_hash)
+            for u in range(users)
+        ]
+        db.session.add_all(accounts)
+        db.session.flush()
+        user_ids = [user.id for user in accounts]
+
+        conversations = {}
+        for user_id in user_ids:
+            conversations[user_id] = []
+            for c in range(conversations_per_user):
+                conversation = Conversation(user_id=user_id, title=f'Benchmark conversation {c}')
+                conversation.messages.append(ConversationMessage(role='user', content='Tell me about black holes.'))
+                conversation.messages.append(ConversationMessage(role='assistant', content='Black holes are...'))
+                conversations[user_id].append(conversation)
+            db.session.add_all(conversations[user_id])
+            db.session.add_all(
+                SavedItem(user_id=user_id, category='fact', content=f'Seeded favourite {n}', topic=TOPICS[n % len(TOPICS)])
+                for n in range(FAVOURITES_PER_USER)
+            )
+
+        now = datetime.utcnow()
+        record_searches((user_ids[n % users], TOPICS[n % len(TOPICS)], 'facts', now) for n in range(200))
+        db.session.commit()
+
+        tokens = [create_access_token(identity=str(user_id)) for user_id in user_ids]
+        conversation_ids = [[c.id for c in conversations[user_id]] for user_id in user_ids]
+
+    return Fixture(run_id, user_ids, tokens, conversation_ids, unique_topics)
+
+
+def _reset_quotas(app, db, user_ids):
+    """Gives every benchmark user a fresh daily quota so a scenario never measures 429s."""
+    from app.models import User
+
+    with app.app_context():
+        User.query.filter(User.id.in_(user_ids)).update(
+            {'daily_request_count': 0}, synchronize_session=False
+        )
+        db.session.commit()
+
+
+def _cache_counts():
+    """(hits, lookups) of the response cache so far, in this (the app's) process."""
+    from app.services.response_cache import response_cache
+
+    stats = response_cache.stats()
+    return stats['local_hits'] + stats['shared_hits'], stats['local_hits'] + stats['shared_hits'] + stats['misses']
+
+
+def _run_scenario(client, fixture, name, requests, concurrency, offset):
+    build = SCENARIOS[name]
+
+    def one(i):
+        method, path, body, headers = build(fixture, offset + i)
+        started = time.perf_counter()
+        try:
+            response = client.request(method, path, json=body, headers=headers)
+        except httpx.HTTPError:
+            return time.perf_counter() - started, None, 0
+        elapsed = time.perf_counter() - started
+        return elapsed, response.status_code, int(response.headers.get('X-Bench-Queries', 0))
+
+    hits_before, lookups_before = _cache_counts()
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        samples = list(pool.map(one, range(requests)))
+    wall = time.perf_counter() - started
+    hits, lookups = (after - before for after, before in zip(_cache_counts(), (hits_before, lookups_before)))
+
+    latencies = sorted(elapsed * 1000 for elapsed, _, _ in samples)
+    errors = sum(1 for _, status, _ in samples if status is None or status >= 400)
+    statuses = {}
+    for _, status, _ in samples:
+        statuses[str(status)] = statuses.get(str(status), 0) + 1
+
+    return {
+        'requests': requests,
+        'errors': errors,
+        'statuses': statuses,
+        'throughput_rps': round(requests / wall, 2),
+        'latency_ms': {
+            'p50': round(_percentile(latencies, 50), 2),
+            'p95': round(_percentile(latencies, 95), 2),
+            'p99': round(_percentile(latencies, 99), 2),
+            'mean': round(sum(latencies) / len(latencies), 2),
+            'max': round(latencies[-1], 2),
+        },
+        'db_queries_per_request': round(sum(q for _, _, q in samples) / requests, 2),
+        # None for scenarios that never look up the response cache
+        'cache_hit_ratio': round(hits / lookups, 3) if lookups else None,
+    }
+
+
+def _git_commit():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], text=True, stderr=subprocess.DEVNULL).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _print_results(results):
+    header = (f"{'scenario':<22}{'rps':>9}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'queries':>9}"
+              f"{'cache hit':>11}{'errors':>8}")
+    print(header)
+    print('-' * len(header))
+    for name, r in results.items():
+        lat = r['latency_ms']
+        hit_ratio = r.get('cache_hit_ratio')
+        hit_ratio = f'{hit_ratio:.0%}' if hit_ratio is not None else '-'
+        print(f"{name:<22}{r['throughput_rps']:>9.1f}{lat['p50']:>10.1f}{lat['p95']:>10.1f}"
+              f"{lat['p99']:>10.1f}{r['db_queries_per_request']:>9.1f}{hit_ratio:>11}{r['errors']:>8}")
+
+
+def _print_comparison(results, baseline):
+    """Prints relative change against an earlier --output file (positive = higher)."""
+    def delta(new, old):
+        return f'{(new - old) / old * 100:+.1f}%' if old else 'n/a'
+
+    print(f"\nvs. baseline {baseline['meta'].get('commit') or ''}")
+    header = f"{'scenario':<22}{'rps':>10}{'p50':>10}{'p99':>10}{'queries':>10}"
+    print(header)
+    print('-' * len(header))
+    for name, r in results.items():
+        old = baseline['results'].get(name)
+        if old is None:
+            continue
+        print(f"{name:<22}{delta(r['throughput_rps'], old['throughput_rps']):>10}"
+              f"{delta(r['latency_ms']['p50'], old['latency_ms']['p50']):>10}"
+              f"{delta(r['latency_ms']['p99'], old['latency_ms']['p99']):>10}"
+              f"{delta(r['db_queries_per_request'], old['db_queries_per_request']):>10}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--database-url', help='Scratch database (default: a new SQLite file)')
+    parser.add_argument('--concurrency', type=int, default=16, help='Concurrent clients')
+    parser.add_argument('--requests', type=int, default=200, help='Measured requests per scenario')
+    parser.add_argument('--warmup', type=int, default=10, help='Unmeasured requests per scenario')
+    parser.add_argument('--users', type=int, default=20, help='Benchmark users requests are spread across')
+    parser.add_argument('--upstream', choices=['http', 'stub'], default='http',
+                        help='Fake OpenAI over HTTP (exercises the pooled client) or the in-process stub provider')
+    parser.add_argument('--latency-ms', type=float, default=500, help='Mean fake OpenAI latency')
+    parser.add_argument('--jitter-ms', type=float, default=100, help='Standard deviation of the fake latency')
+    parser.add_argument('--unique-topics', action='store_true',
+                        help='Give every facts/quotes request its own topic, so none is served from the cache')
+    parser.add_argument('--scenarios', help=f"Comma-separated subset of: {', '.join(SCENARIOS)}")
+    parser.add_argument('--output', help='Write results as JSON to this file')
+    parser.add_argument('--compare', help='Earlier --output file to compare against')
+    args = parser.parse_args(argv)
+
+    scenarios = args.scenarios.split(',') if args.scenarios else list(SCENARIOS)
+    unknown = set(scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(sorted(unknown))}")
+
+    upstream = None
+    if args.upstream == 'http':
+        upstream = FakeOpenAIServer(latency_ms=args.latency_ms, jitter_ms=args.jitter_ms, seed=0).start()
+        os.environ['OPENAI_BASE_URL'] = upstream.base_url
+    else:
+        os.environ['LLM_PROVIDER'] = 'stub'
+        os.environ['LLM_STUB_LATENCY_MS'] = str(args.latency_ms)
+        os.environ['LLM_STUB_LATENCY_DISTRIBUTION'] = 'normal'
+        os.environ['LLM_STUB_LATENCY_JITTER'] = str(args.jitter_ms)
+
+    # Config is read at import time, so the environment has to be set before the app is imported
+    database_url = args.database_url or f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'bench.sqlite')}"
+    os.environ['DATABASE_URL'] = database_url
+    os.environ.setdefault('OPENAI_API_KEY', 'sk-benchmark')
+    os.environ.setdefault('JWT_SECRET_KEY', 'benchmark-secret-key-0123456789abcdef')
+    os.environ.setdefault('RESPONSE_CACHE_MAX_ENTRIES', '1024')
+
+    from werkzeug.serving import make_server
+    from app import create_app, db
+    from app.services.rate_limiter import DAILY_LIMIT
+
+    app = create_app()
+    _install_query_counter(app, db)
+
+    # Every user needs enough quota and conversations for its share of a scenario
+    per_user = math.ceil((args.requests + args.warmup) / args.users)
+    if per_user > DAILY_LIMIT:
+        parser.error(f'--users must be at least {math.ceil((args.requests + args.warmup) / DAILY_LIMIT)} '
+                     f'to stay within DAILY_LIMIT ({DAILY_LIMIT})')
+    fixture = _seed(app, db, args.users, per_user, args.unique_topics)
+
+    logging.getLogger('werkzeug').setLevel(logging.ERROR)  # No per-request access log
+    server = make_server('127.0.0.1', 0, app, threaded=True)
+    threading.Thread(target=server.serve_forever, name='bench-app', daemon=True).start()
+    base_url = f'http://127.0.0.1:{server.server_port}'
+
+    results = {}
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    with httpx.Client(base_url=base_url, limits=limits, timeout=120) as client:
+        for name in scenarios:
+            _reset_quotas(app, db, fixture.user_ids)
+            if args.warmup:
+                _run_scenario(client, fixture, name, args.warmup, min(args.concurrency, args.warmup), 0)
+            results[name] = _run_scenario(client, fixture, name, args.requests, args.concurrency, args.warmup)
+            print(f'{name}: done', file=sys.stderr)
+
+    server.shutdown()
+    if upstream is not None:
+        upstream.shutdown()
+
+    report = {
+        'meta': {
+            'commit': _git_commit(),
+            'timestamp': datetime.utcnow().isoformat(timespec='seconds') + 'Z',
+            'python': platform.python_version(),
+            'database': database_url.split(':', 1)[0],
+            'concurrency': args.concurrency,
+            'requests': args.requests,
+            'users': args.users,
+            'unique_topics': args.unique_topics,
+            'upstream': args.upstream,
+            'password_hash_method': app.config['PASSWORD_HASH_METHOD'],
+            'password_hash_workers': app.config['PASSWORD_HASH_WORKERS'],
+            'upstream_latency_ms': args.latency_ms,
+            'upstream_jitter_ms': args.jitter_ms,
+        },
+        'results': results,
+    }
+
+    _print_results(results)
+    if args.compare:
+        with open(args.compare) as f:
+            _print_comparison(results, json.load(f))
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+
+    return report
+
+
+if __name__ == '__main__':
+    main()
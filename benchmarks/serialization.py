@@ -0,0 +1,207 @@
+"""
+Serialization microbenchmark for the hot read endpoints.
+
+Compares, for each response shape, the marshmallow path (ORM objects dumped
+by the SQLAlchemyAutoSchema, then jsonify) with the precompiled path (row
+tuples from schemas/row_serializers.py, then fast_json.json_response). Both
+paths run their own query against a scratch SQLite database, and their
+response bodies are checked to be byte-identical before anything is timed.
+
+    python -m benchmarks.serialization --items 500 --repeat 200
+    python -m benchmarks.serialization --unicode-ratio 0   # all-ASCII text: orjson is used for every body
+
+orjson's output is used only when it is pure ASCII without DEL (0x7f).
+jsonify escapes those characters (ensure_ascii) and orjson can't, so a body
+with a single one of them is re-encoded with the stdlib json module. With the
+default --unicode-ratio 0.1, nearly every 500-item favourites page contains
+one, and the gain there comes from skipping marshmallow alone.
+
+Measured on one CPU with the defaults (--repeat 100), precompiled vs marshmallow:
+
+    shape                 default (10% non-ASCII)   all-ASCII (--unicode-ratio 0)
+    favourites.list       1.8x  (13.3 -> 7.3 ms)    4.2x  (12.4 -> 3.0 ms)
+    conversation.list     2.6x  (4.5 -> 1.7 ms)     2.7x  (2.5 -> 0.9 ms)
+    conversation.detail   1.6x  (1.6 -> 1.0 ms)     1.4x  (0.9 -> 0.6 ms)
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+WORDS = ['black', 'holes', 'octopus', 'roman', 'empire', 'volcano', 'jazz', 'honey', 'bee', 'quantum',
+         'moon', 'chess', 'coffee', 'light', 'year', 'ancient', 'ocean', 'star', 'ice', 'river']
+UNICODE_WORDS = ['café', 'naïve', 'Zürich', 'São Paulo', '東京', 'emoji 🚀']
+
+
+def _text(rng, words, unicode_ratio):
+    chosen = [rng.choice(WORDS) for _ in range(words)]
+    if rng.random() < unicode_ratio:
+        chosen[rng.randrange(words)] = rng.choice(UNICODE_WORDS)
+    return ' '.join(chosen).capitalize() + '.'
+
+
+def _seed(db, args):
+    from app.models import Conversation, ConversationMessage, SavedItem, User
+
+    rng = random.Random(args.seed)
+    user = User(username='bench-serializer', email='bench-serializer@example.com', password_hash='x')
+    db.session.add(user)
+    db.session.flush()
+
+    start = datetime(2026, 1, 1)
+    for i in range(args.items):
+        quote = i % 2 == 1
+        db.session.add(SavedItem(
+            user_id=user.id,
+            category='quote' if quote else 'fact',
+            content=_text(rng, 25, args.unicode_ratio),
+            author=rng.choice(['Marie Curie', 'Carl Sagan', 'Ada Lovelace']) if quote else None,
+            topic=rng.choice(WORDS),
+            # Every few rows on a whole second, so isoformat() with and without microseconds both show up
+            created_at=start + timedelta(seconds=i, microseconds=0 if i % 4 == 0 else rng.randrange(1, 10 ** 6)),
+        ))
+
+    conversations = []
+    for c in range(args.conversations):
+        conversation = Conversation(user_id=user.id, title=_text(rng, 4, args.unicode_ratio)[:50],
+                                    created_at=start + timedelta(minutes=c))
+        db.session.add(conversation)
+        conversations.append(conversation)
+    db.session.flush()
+
+    for conversation in conversations:
+        for m in range(args.messages):
+            db.session.add(ConversationMessage(
+                conversation_id=conversation.id,
+                role='user' if m % 2 == 0 else 'assistant',
+                content=_text(rng, 12 if m % 2 == 0 else 60, args.unicode_ratio),
+                created_at=conversation.created_at + timedelta(seconds=m, microseconds=rng.randrange(10 ** 6)),
+            ))
+    db.session.commit()
+    return user.id, conversations[0].id
+
+
+def _shapes(user_id, conversation_id, limit):
+    """name -> (marshmallow path, precompiled path), each returning a Response."""
+    from flask import jsonify
+    from sqlalchemy.orm import undefer
+    from app import db
+    from app.models import Conversation, ConversationMessage, SavedItem
+    from app.schemas.conversation_schema import conversation_detail_schema, conversation_list_schema
+    from app.schemas.row_serializers import (
+        CONVERSATION_DETAIL_COLUMNS,
+        CONVERSATION_LIST_COLUMNS,
+        MESSAGE_COLUMNS,
+        SAVED_ITEM_COLUMNS,
+        conversation_detail,
+        conversation_list_row,
+        saved_item_row,
+    )
+    from app.schemas.saved_item_schema import saved_items_response_schema
+    from app.services.fast_json import json_response
+    from app.services.pagination import newest_first_page_query
+
+    def favourites_marshmallow():
+        query = SavedItem.query.filter_by(user_id=user_id)
+        items = newest_first_page_query(query, SavedItem, limit).all()[:limit]
+        return jsonify({'favourites': saved_items_response_schema.dump(items), 'count': len(items)})
+
+    def favourites_fast():
+        query = db.session.query(*SAVED_ITEM_COLUMNS).filter(SavedItem.user_id == user_id)
+        items = newest_first_page_query(query, SavedItem, limit).all()[:limit]
+        return json_response({'favourites': [saved_item_row(row) for row in items], 'count': len(items)})
+
+    def conversations_marshmallow():
+        query = Conversation.query.filter_by(user_id=user_id).options(undefer(Conversation.message_count))
+        conversations = newest_first_page_query(query, Conversation, limit).all()[:limit]
+        return jsonify({'conversations': conversation_list_schema.dump(conversations)})
+
+    def conversations_fast():
+        query = db.session.query(*CONVERSATION_LIST_COLUMNS).filter(Conversation.user_id == user_id)
+        conversations = newest_first_page_query(query, Conversation, limit).all()[:limit]
+        return json_response({'conversations': [conversation_list_row(row) for row in conversations]})
+
+    def detail_marshmallow():
+        # Fresh identity map each time, as in a real request
+        db.session.expire_all()
+        return jsonify({'conversation': conversation_detail_schema.dump(db.session.get(Conversation, conversation_id))})
+
+    def detail_fast():
+        conversation = db.session.query(*CONVERSATION_DETAIL_COLUMNS).filter(Conversation.id == conversation_id).first()
+        messages = db.session.query(*MESSAGE_COLUMNS).filter(
+            ConversationMessage.conversation_id == conversation_id
+        ).order_by(ConversationMessage.created_at, ConversationMessage.id).all()
+        return json_response({'conversation': conversation_detail(conversation, messages)})
+
+    return {
+        'favourites.list': (favourites_marshmallow, favourites_fast),
+        'conversation.list': (conversations_marshmallow, conversations_fast),
+        'conversation.detail': (detail_marshmallow, detail_fast),
+    }
+
+
+def _time(fn, repeat, expire):
+    samples = []
+    for _ in range(repeat):
+        expire()
+        started = time.perf_counter()
+        fn().get_data()
+        samples.append(time.perf_counter() - started)
+    return statistics.median(samples) * 1000
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--items', type=int, default=500, help='Favourites seeded (and listed per call)')
+    parser.add_argument('--conversations', type=int, default=100, help='Conversations seeded (and listed per call)')
+    parser.add_argument('--messages', type=int, default=20, help='Messages per conversation')
+    parser.add_argument('--repeat', type=int, default=100, help='Timed calls per path')
+    parser.add_argument('--unicode-ratio', type=float, default=0.1,
+                        help='Share of texts with non-ASCII characters (those bodies use the stdlib encoder)')
+    parser.add_argument('--seed', type=int, default=7, help='Random seed for the seeded text')
+    args = parser.parse_args(argv)
+
+    # Config is read at import time, so the environment has to be set before the app is imported
+    scratch = tempfile.NamedTemporaryFile(prefix='bench-serialization-', suffix='.sqlite', delete=False)
+    scratch.close()
+    os.environ['DATABASE_URL'] = f'sqlite:///{scratch.name}'
+    os.environ.setdefault('OPENAI_API_KEY', 'sk-benchmark')
+    os.environ.setdefault('JWT_SECRET_KEY', 'benchmark-secret-key-0123456789abcdef')
+    os.environ.setdefault('PASSWORD_HASH_WORKERS', '0')
+
+    from app import create_app, db
+    from app.services import fast_json
+
+    app = create_app()
+    try:
+        with app.app_context():
+            db.create_all()
+            user_id, conversation_id = _seed(db, args)
+            limit = max(args.items, args.conversations)
+
+            print(f'encoder: {"orjson" if fast_json.orjson else "stdlib json"}, '
+                  f'{args.items} favourites, {args.conversations} conversations x {args.messages} messages')
+            print(f'{"shape":22} {"marshmallow ms":>15} {"precompiled ms":>15} {"speedup":>8} {"bytes":>9}')
+
+            failed = False
+            for name, (slow, fast) in _shapes(user_id, conversation_id, limit).items():
+                expected, actual = slow().get_data(), fast().get_data()
+                if expected != actual:
+                    print(f'{name:22} OUTPUT DIFFERS ({len(expected)} vs {len(actual)} bytes)')
+                    failed = True
+                    continue
+                slow_ms = _time(slow, args.repeat, db.session.expire_all)
+                fast_ms = _time(fast, args.repeat, db.session.expire_all)
+                print(f'{name:22} {slow_ms:15.2f} {fast_ms:15.2f} {slow_ms / fast_ms:7.1f}x {len(expected):9}')
+    finally:
+        os.remove(scratch.name)
+
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,40 @@
+import os
+import shutil
+
+# "sync" pins a worker for the whole OpenAI round trip. "gevent" runs each request
+# in a greenlet, so one process can hold hundreds of in-flight upstream calls.
+worker_class = os.getenv('GUNICORN_WORKER_CLASS', 'sync')
+worker_connections = int(os.getenv('GUNICORN_WORKER_CONNECTIONS', 500))
+timeout = int(os.getenv('GUNICORN_TIMEOUT', 120))
+preload_app = os.getenv('GUNICORN_PRELOAD', 'false').lower() == 'true'
+
+
+def on_starting(server):
+    # Multiprocess metric files from a previous run would be merged into this one
+    multiproc_dir = os.getenv('PROMETHEUS_MULTIPROC_DIR')
+    if multiproc_dir:
+        shutil.rmtree(multiproc_dir, ignore_errors=True)
+        os.makedirs(multiproc_dir)
+
+
+def post_worker_init(worker):
+    # psycopg2 is a C extension that gevent's monkey patching can't reach,
+    # so make its socket waits cooperative explicitly
+    if worker_class == 'gevent':
+        from psycogreen.gevent import patch_psycopg
+        patch_psycopg()
+
+
+def worker_exit(server, worker):
+    # Write out searches still sitting in the write-behind buffer, and stop the hashing processes
+    from app.services.search_log import search_log
+    search_log.shutdown()
+    from app.services.passwords import password_hasher
+    password_hasher.shutdown()
+
+
+def child_exit(server, worker):
+    # Drop the dead worker's gauges; its counters and histograms stay in the totals
+    if os.getenv('PROMETHEUS_MULTIPROC_DIR'):
+        from prometheus_client import multiprocess
+        multiprocess.mark_process_dead(worker.pid)
@@ -0,0 +1,35 @@
+"""Make saved_items/conversations created_at NOT NULL for keyset pagination
+
+Revision ID: a1e4c9d27f60
+Revises: f3b7c2a91d54
+Create Date: 2026-10-18 20:02:13.408117
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a1e4c9d27f60'
+down_revision = 'f3b7c2a91d54'
+branch_labels = None
+depends_on = None
+
+
+# Page cursors are built from (created_at, id), so every paged row needs a
+# created_at. Rows that predate the column default are of unknown age - they
+# get the epoch and sort as the oldest.
+TABLES = ['saved_items', 'conversations']
+
+
+def upgrade():
+    for table in TABLES:
+        op.execute(f"UPDATE {table} SET created_at = '1970-01-01 00:00:00' WHERE created_at IS NULL")
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.alter_column('created_at', existing_type=sa.DateTime(), nullable=False)
+
+
+def downgrade():
+    for table in TABLES:
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.alter_column('created_at', existing_type=sa.DateTime(), nullable=True)
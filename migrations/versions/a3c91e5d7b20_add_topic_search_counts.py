@@ -0,0 +1,35 @@
+"""Add topic_search_counts rollup table for trending
+
+Revision ID: a3c91e5d7b20
+Revises: 5f0e454a6bba
+Create Date: 2026-10-18 10:12:03.118274
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a3c91e5d7b20'
+down_revision = '5f0e454a6bba'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('topic_search_counts',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('feature', sa.String(length=10), nullable=False),
+    sa.Column('topic', sa.String(length=200), nullable=False),
+    sa.Column('bucket', sa.String(length=10), nullable=False),
+    sa.Column('count', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('feature', 'topic', 'bucket', name='uq_topic_search_counts_key')
+    )
+    op.create_index('ix_topic_search_counts_ranking', 'topic_search_counts', ['feature', 'bucket', 'count'], unique=False)
+    # Run `flask trending backfill` afterwards to build rollups from existing searches
+
+
+def downgrade():
+    op.drop_index('ix_topic_search_counts_ranking', table_name='topic_search_counts')
+    op.drop_table('topic_search_counts')
@@ -0,0 +1,28 @@
+"""Add rolling summary columns to conversations
+
+Revision ID: b52e8d17c4a9
+Revises: e91d03a6c5f2
+Create Date: 2026-10-18 14:22:10.518306
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b52e8d17c4a9'
+down_revision = 'e91d03a6c5f2'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('conversations', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('summary', sa.Text(), nullable=True))
+        batch_op.add_column(sa.Column('summarized_through_id', sa.Integer(), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('conversations', schema=None) as batch_op:
+        batch_op.drop_column('summarized_through_id')
+        batch_op.drop_column('summary')
@@ -0,0 +1,35 @@
+"""Add composite indexes for favourites, conversation and message queries
+
+Revision ID: c47e2b9f10d6
+Revises: a3c91e5d7b20
+Create Date: 2026-10-18 11:40:27.503918
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c47e2b9f10d6'
+down_revision = 'a3c91e5d7b20'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # GET /favourites/ (with and without ?category), newest first
+    op.create_index('ix_saved_items_user_created', 'saved_items', ['user_id', 'created_at'], unique=False)
+    op.create_index('ix_saved_items_user_category_created', 'saved_items', ['user_id', 'category', 'created_at'], unique=False)
+    # GET /conversation/conversations, newest first
+    op.create_index('ix_conversations_user_created', 'conversations', ['user_id', 'created_at'], unique=False)
+    # Message limit count in send_message, and message history ordered by time
+    op.create_index('ix_conversation_messages_conversation_role', 'conversation_messages', ['conversation_id', 'role'], unique=False)
+    op.create_index('ix_conversation_messages_conversation_created', 'conversation_messages', ['conversation_id', 'created_at'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_conversation_messages_conversation_created', table_name='conversation_messages')
+    op.drop_index('ix_conversation_messages_conversation_role', table_name='conversation_messages')
+    op.drop_index('ix_conversations_user_created', table_name='conversations')
+    op.drop_index('ix_saved_items_user_category_created', table_name='saved_items')
+    op.drop_index('ix_saved_items_user_created', table_name='saved_items')
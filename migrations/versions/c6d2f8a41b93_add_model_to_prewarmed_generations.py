@@ -0,0 +1,34 @@
+"""Key prewarmed_generations by provider/model as well
+
+Revision ID: c6d2f8a41b93
+Revises: a1e4c9d27f60
+Create Date: 2026-10-18 20:21:37.662081
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c6d2f8a41b93'
+down_revision = 'a1e4c9d27f60'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Existing rows don't say which backend made them - they're regenerated on
+    # the next pre-warm run, so drop them rather than guess
+    op.execute('DELETE FROM prewarmed_generations')
+    with op.batch_alter_table('prewarmed_generations', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('model', sa.String(length=100), nullable=False))
+        batch_op.drop_constraint('uq_prewarmed_generations_key', type_='unique')
+        batch_op.create_unique_constraint('uq_prewarmed_generations_key', ['feature', 'topic', 'model'])
+
+
+def downgrade():
+    op.execute('DELETE FROM prewarmed_generations')
+    with op.batch_alter_table('prewarmed_generations', schema=None) as batch_op:
+        batch_op.drop_constraint('uq_prewarmed_generations_key', type_='unique')
+        batch_op.create_unique_constraint('uq_prewarmed_generations_key', ['feature', 'topic'])
+        batch_op.drop_column('model')
@@ -0,0 +1,35 @@
+"""Add token_usage_daily table for per-user token accounting
+
+Revision ID: d8a4f1c7e3b6
+Revises: b52e8d17c4a9
+Create Date: 2026-10-18 15:40:27.304118
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd8a4f1c7e3b6'
+down_revision = 'b52e8d17c4a9'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('token_usage_daily',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('feature', sa.String(length=20), nullable=False),
+    sa.Column('requests', sa.Integer(), nullable=False),
+    sa.Column('prompt_tokens', sa.Integer(), nullable=False),
+    sa.Column('completion_tokens', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('user_id', 'day', 'feature', name='uq_token_usage_daily_key')
+    )
+
+
+def downgrade():
+    op.drop_table('token_usage_daily')
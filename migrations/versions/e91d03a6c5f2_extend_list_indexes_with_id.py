@@ -0,0 +1,37 @@
+"""Extend favourites/conversation list indexes with id for keyset pagination
+
+Revision ID: e91d03a6c5f2
+Revises: c47e2b9f10d6
+Create Date: 2026-10-18 13:05:44.920173
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e91d03a6c5f2'
+down_revision = 'c47e2b9f10d6'
+branch_labels = None
+depends_on = None
+
+
+# Pages are ordered by (created_at, id), so id has to be in the index for the
+# cursor seek to stay an index range scan
+INDEXES = [
+    ('ix_saved_items_user_created', 'saved_items', ['user_id', 'created_at']),
+    ('ix_saved_items_user_category_created', 'saved_items', ['user_id', 'category', 'created_at']),
+    ('ix_conversations_user_created', 'conversations', ['user_id', 'created_at']),
+]
+
+
+def upgrade():
+    for name, table, columns in INDEXES:
+        op.drop_index(name, table_name=table)
+        op.create_index(name, table, columns + ['id'], unique=False)
+
+
+def downgrade():
+    for name, table, columns in INDEXES:
+        op.drop_index(name, table_name=table)
+        op.create_index(name, table, columns, unique=False)
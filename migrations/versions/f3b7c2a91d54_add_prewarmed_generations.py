@@ -0,0 +1,32 @@
+"""Add prewarmed_generations table for trending topic pre-warming
+
+Revision ID: f3b7c2a91d54
+Revises: d8a4f1c7e3b6
+Create Date: 2026-10-18 18:12:44.517903
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f3b7c2a91d54'
+down_revision = 'd8a4f1c7e3b6'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('prewarmed_generations',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('feature', sa.String(length=10), nullable=False),
+    sa.Column('topic', sa.String(length=200), nullable=False),
+    sa.Column('content', sa.Text(), nullable=False),
+    sa.Column('generated_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('feature', 'topic', name='uq_prewarmed_generations_key')
+    )
+
+
+def downgrade():
+    op.drop_table('prewarmed_generations')